@@ -0,0 +1,364 @@
+"""Vectorised statistics behind the Advanced Analytics views.
+
+Everything here works on whole columns at once: per-group sums are gathered
+with ``np.bincount`` and the per-group problems are solved as one stacked
+NumPy call, so the cost does not grow with a Python loop over groups.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+from backends import cross_products, product_column
+from kpis import BUILTIN_KPIS, compile_kpi
+
+COMPARE_COLUMNS = [
+    "DSRE", "Discard Ratio", "Total_SCE", "Total_Dil", "ROP", "Temp", "DOW", "AMW",
+    "Drilling_Hours", "Haul_OFF", "Base_Oil", "Water", "Weight_Material",
+    "Chemicals", "Dilution_Ratio", "Solids_Generated"
+]
+DRIVER_TARGETS = ["DSRE", "Dilution_Ratio"]
+DRIVER_FEATURES = ["AMW", "Average_LGS%", "ROP", "Temp", "Hole_Size", "IntLength"]
+
+
+def shaker_type(shakers):
+    """"Derrick" where the flowline shaker name mentions Derrick, else "Non-Derrick"."""
+    is_derrick = shakers.astype("string").str.contains("derrick", case=False, na=False)
+    return pd.Series(np.where(is_derrick, "Derrick", "Non-Derrick"), index=shakers.index)
+
+
+def shaker_family(shakers):
+    """Manufacturer of each flowline shaker ("Derrick", "Brandt", "MI Swaco", ...)."""
+    family = shakers.astype("string").str.strip().str.extract(r"(?i)^(MI[\s-]*Swaco|\S+)")[0]
+    return family.str.replace(r"^MI[\s-]*Swaco$", "MI Swaco", case=False, regex=True).fillna("Unknown")
+
+
+def derrick_comparison(df, metrics):
+    """Average of each metric for Derrick and Non-Derrick shakers, one row per metric."""
+    metrics = [col for col in metrics if col in df.columns]
+    means = df[metrics].groupby(shaker_type(df["flowline_Shakers"])).mean().T
+    means = means.reindex(columns=["Derrick", "Non-Derrick"])
+    return means.rename_axis("Metric").rename_axis(None, axis=1).reset_index()
+
+
+def derrick_comparison_totals(sums, counts, metrics):
+    """``derrick_comparison`` from per-shaker ``sum`` and ``count`` aggregates.
+
+    ``sums`` and ``counts`` are ``backend.aggregate(..., by="flowline_Shakers")``
+    frames, so every row is counted however many the backend would return.
+    """
+    metrics = [col for col in metrics if col in sums.columns]
+    kind = shaker_type(sums["flowline_Shakers"])
+    totals = sums[metrics].groupby(kind).sum() / counts[metrics].groupby(kind).sum()
+    means = totals.T.reindex(columns=["Derrick", "Non-Derrick"])
+    return means.rename_axis("Metric").rename_axis(None, axis=1).reset_index()
+
+
+def efficiency_score(df):
+    """The built-in Efficiency Score KPI; its ``fillna`` calls count missing inputs, or columns, as 0."""
+    kpi = compile_kpi("Efficiency Score", BUILTIN_KPIS["Efficiency Score"])
+    return kpi.evaluate(df.reindex(columns=list(kpi.columns)))
+
+
+def efficiency_ranking(df, kpi="Efficiency Score"):
+    """Wells ranked by ``kpi``, best first.
+
+    KPI columns come from the backend (see ``kpis``); a frame without an
+    ``Efficiency Score`` column is scored with the built-in definition.
+    """
+    if kpi in df.columns:
+        score = df[kpi]
+    elif kpi == "Efficiency Score":
+        score = efficiency_score(df)
+    else:
+        raise KeyError(kpi)
+    ranked = pd.DataFrame({
+        "Well_Name": df["Well_Name"],
+        "Shaker_Type": shaker_type(df["flowline_Shakers"]),
+        kpi: score,
+    })
+    return ranked.sort_values(by=kpi, ascending=False).reset_index(drop=True)
+
+
+def driver_regression(df, target, features=DRIVER_FEATURES, by="Contractor"):
+    """Fit ``target ~ features`` separately for every ``by`` group in one pass.
+
+    Features are standardised over the whole frame first, so each coefficient
+    is the change in ``target`` per one standard deviation of that driver and
+    rows of the table compare directly across groups and drivers.
+
+    Returns a long frame with one row per (group, term): ``coef``, ``se``,
+    ``t`` plus the group's ``n`` and ``r2``. Groups with too few rows, or
+    where a driver never varies, get NaN statistics.
+    """
+    features = [col for col in features if col in df.columns]
+    moments = cross_products(df, [target] + features, by, center=df[features].mean().to_dict())
+    return driver_regression_from_moments(moments, target, features, by)
+
+
+def driver_regression_from_moments(moments, target, features=DRIVER_FEATURES, by="Contractor"):
+    """``driver_regression`` from ``cross_products`` of ``[target] + features``.
+
+    A backend can sum those in the engine, so the fit never needs the rows.
+    The features may be centred by any offset (the fit standardises them
+    anyway); the target must not be.
+    """
+    features = [col for col in features if col in moments.columns]
+    labels = moments[by].to_numpy()
+    groups = len(labels)
+    n = moments["n"].to_numpy(dtype=float)
+
+    # Gram matrix of [1, features..., target] for every group.
+    columns = features + [target]
+    q = len(columns) + 1
+    gram = np.empty((groups, q, q))
+    gram[:, 0, 0] = n
+    for i, a in enumerate(columns, start=1):
+        gram[:, 0, i] = gram[:, i, 0] = moments[a].to_numpy(dtype=float)
+        for j, b in enumerate(columns[i - 1:], start=i):
+            name = product_column(a, b) if product_column(a, b) in moments.columns else product_column(b, a)
+            gram[:, i, j] = gram[:, j, i] = moments[name].to_numpy(dtype=float)
+
+    # Standardising is linear, x' = (x - mean) / std, so Z'Z = A G A' with the
+    # global mean and (population) std taken from the summed moments.
+    total = gram.sum(axis=0)
+    mean = total[0, 1:-1] / max(total[0, 0], 1.0)
+    std = np.sqrt(np.maximum(np.diagonal(total)[1:-1] / max(total[0, 0], 1.0) - mean ** 2, 0.0))
+    std = np.where(std > 0, std, 1.0)
+    A = np.eye(q)
+    A[1:-1, 0] = -mean / std
+    A[1:-1, 1:-1] = np.diag(1.0 / std)
+    gram = A @ gram @ A.T
+
+    p = q - 1
+    xtx, xty = gram[:, :p, :p], gram[:, :p, p]
+    yty, ysum = gram[:, p, p], gram[:, 0, p]
+
+    xtx_inv = np.linalg.pinv(xtx)
+    beta = np.einsum("gij,gj->gi", xtx_inv, xty)
+    rss = np.maximum(yty - np.einsum("gi,gi->g", beta, xty), 0.0)
+    tss = yty - ysum ** 2 / np.maximum(n, 1)
+    dof = n - p
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sigma2 = np.where(dof > 0, rss / dof, np.nan)
+        se = np.sqrt(sigma2[:, None] * np.diagonal(xtx_inv, axis1=1, axis2=2))
+        r2 = np.where(tss > 0, 1 - rss / tss, np.nan)
+        t = beta / se
+    valid = (dof > 0) & (np.linalg.matrix_rank(xtx) == p)
+    beta[~valid] = se[~valid] = t[~valid] = np.nan
+    r2 = np.where(valid, r2, np.nan)
+
+    terms = ["Intercept"] + features
+    return pd.DataFrame({
+        by: np.repeat(labels, p),
+        "term": np.tile(terms, groups),
+        "coef": beta.ravel(),
+        "se": se.ravel(),
+        "t": t.ravel(),
+        "n": np.repeat(n.astype(int), p),
+        "r2": np.repeat(r2, p),
+    })
+
+
+def driver_table(results, by, value="coef"):
+    """Pivot ``driver_regression`` output to one row per group, one column per driver."""
+    wide = results[results["term"] != "Intercept"].pivot(index=by, columns="term", values=value)
+    stats = results.groupby(by)[["n", "r2"]].first()
+    return stats.join(wide).sort_values("n", ascending=False)
+
+
+BENCHMARK_METRICS = ["DSRE", "Total_Dil", "Discard Ratio", "ROP"]
+
+
+def _t_two_sided_p(t, dof, iterations=200):
+    """Two-sided Student-t p-values, ``I_x(dof/2, 1/2)`` with ``x = dof / (dof + t^2)``.
+
+    The regularised incomplete beta is evaluated with its continued fraction
+    (modified Lentz) on whole arrays at once; no SciPy needed.
+    """
+    a, b = dof / 2.0, 0.5
+    x = dof / (dof + t * t)
+    # The fraction converges fast for x < (a+1)/(a+b+2); use the symmetry relation otherwise.
+    flip = x > (a + 1) / (a + b + 2)
+    a, b, x = np.where(flip, b, a), np.where(flip, a, b), np.where(flip, 1 - x, x)
+    lgamma = np.vectorize(math.lgamma, otypes=[float])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        front = np.exp(lgamma(a + b) - lgamma(a) - lgamma(b) + a * np.log(x) + b * np.log1p(-x)) / a
+        tiny = 1e-300
+        c, d = np.ones_like(x), 1 - (a + b) * x / (a + 1)
+        d = 1 / np.where(np.abs(d) < tiny, tiny, d)
+        f = d.copy()
+        for m in range(1, iterations):
+            for numerator in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                              -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+                d = 1 + numerator * d
+                d = 1 / np.where(np.abs(d) < tiny, tiny, d)
+                c = 1 + numerator / c
+                c = np.where(np.abs(c) < tiny, tiny, c)
+                f = f * c * d
+        p = front * f
+    return np.clip(np.where(flip, 1 - p, p), 0.0, 1.0)
+
+
+def pairwise_comparison(df, by="Contractor", metrics=BENCHMARK_METRICS, min_rows=3):
+    """Every ``by`` group against every other on each metric, from per-group summaries.
+
+    Counts, sums and sums of squares come from ``cross_products``; all pairs
+    are then compared by broadcasting those G-length vectors to G x G.
+    Returns a long frame with one row per (metric, group, other): both
+    means, ``diff`` (group - other), Cohen's ``d`` on the pooled standard
+    deviation, Welch's ``t`` and two-sided ``p``, and ``q``, the
+    Benjamini-Hochberg adjusted p within each metric. Groups with fewer than
+    ``min_rows`` values get NaN statistics.
+    """
+    metrics = [col for col in metrics if col in df.columns]
+    center = df[metrics].mean().to_dict()
+    moments = {metric: cross_products(df, [metric], by, center=center) for metric in metrics}
+    return pairwise_comparison_from_moments(moments, by, min_rows, center)
+
+
+def pairwise_comparison_from_moments(moments, by="Contractor", min_rows=3, center=None):
+    """``pairwise_comparison`` from ``{metric: cross_products(..., [metric], by)}``.
+
+    ``center`` is the offset each metric was summed around, added back to
+    the reported means.
+    """
+    center = center or {}
+    frames = []
+    for metric, sums in moments.items():
+        labels = sums[by].to_numpy()
+        groups = len(labels)
+        n = sums["n"].to_numpy(dtype=float)
+        total = sums[metric].to_numpy(dtype=float)
+        squares = sums[product_column(metric, metric)].to_numpy(dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = total / n
+            var = np.maximum(squares - n * mean ** 2, 0.0) / (n - 1)
+        enough = n >= min_rows
+        mean, var = np.where(enough, mean, np.nan), np.where(enough, var, np.nan)
+
+        n_a, n_b = n[:, None], n[None, :]
+        var_a, var_b = var[:, None], var[None, :]
+        diff = mean[:, None] - mean[None, :]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pooled = np.sqrt(((n_a - 1) * var_a + (n_b - 1) * var_b) / (n_a + n_b - 2))
+            d = diff / pooled
+            se2_a, se2_b = var_a / n_a, var_b / n_b
+            t = diff / np.sqrt(se2_a + se2_b)
+            dof = (se2_a + se2_b) ** 2 / (se2_a ** 2 / (n_a - 1) + se2_b ** 2 / (n_b - 1))
+        p = np.full(t.shape, np.nan)
+        testable = np.isfinite(t) & np.isfinite(dof) & (dof > 0)
+        p[testable] = _t_two_sided_p(t[testable], dof[testable])
+        p[np.isnan(t) & (diff == 0) & (se2_a + se2_b == 0)] = 1.0  # two constant groups, same value
+        np.fill_diagonal(p, np.nan)
+
+        # Benjamini-Hochberg over the distinct pairs (upper triangle), mirrored back.
+        upper = np.triu(np.isfinite(p), k=1)
+        ranked = p[upper]
+        order = np.argsort(ranked)
+        adjusted = ranked[order] * len(ranked) / np.arange(1, len(ranked) + 1)
+        adjusted = np.minimum.accumulate(adjusted[::-1])[::-1]
+        q = np.full(p.shape, np.nan)
+        q_upper = np.empty(len(ranked))
+        q_upper[order] = np.minimum(adjusted, 1.0)
+        q[upper] = q_upper
+        q = np.where(np.isfinite(q), q, q.T)
+
+        mean = mean + center.get(metric, 0.0)
+        frames.append(pd.DataFrame({
+            "Metric": metric,
+            by: np.repeat(labels, groups),
+            "Other": np.tile(labels, groups),
+            "n": np.repeat(n, groups).astype(int),
+            "n_other": np.tile(n, groups).astype(int),
+            "mean": np.repeat(mean, groups),
+            "mean_other": np.tile(mean, groups),
+            "diff": diff.ravel(),
+            "d": d.ravel(),
+            "t": t.ravel(),
+            "p": p.ravel(),
+            "q": q.ravel(),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+ANOMALY_COLUMNS = [
+    "DSRE", "DSR", "TMLDR", "Discard Ratio", "TLML", "Down_Loss", "Evap_Loss", "Total_SCE", "Total_Dil",
+    "ROP", "Temp", "DOW", "IntLength", "AMW", "Drilling_Hours", "Haul_OFF", "Base_Oil", "Water",
+    "Weight_Material", "Chemicals", "Reserve_Adds", "Dilution_Ratio", "Dil_Per_Hole_Vol_Ratio",
+    "Solids_Generated", "Average_LGS%",
+]
+# Every column ``score_anomalies`` reads with its defaults; SQL ingestion loads only these.
+ANOMALY_INPUTS = ["Hole_Size"] + ANOMALY_COLUMNS
+ANOMALY_THRESHOLD = 3.5  # Iglewicz & Hoaglin's cut-off for the modified z-score
+ANOMALY_TAIL = 0.01  # most rows the per-column scores may flag between them, as in the IsolationForest option
+MAX_ROP = 1000.0  # ft/hr; faster intervals come from placeholder drilling hours
+
+
+def _rule_violations(df):
+    """Rows that are physically impossible regardless of their group."""
+    rules = pd.Series("", index=df.index)
+    if "DSRE" in df.columns:
+        rules = rules.mask((df["DSRE"] < 0) | (df["DSRE"] > 1), "DSRE outside 0-1")
+    if "ROP" in df.columns:
+        rules = rules.mask((rules == "") & (df["ROP"] > MAX_ROP), f"ROP above {MAX_ROP:,.0f} ft/hr")
+    if {"Total_SCE", "Total_Dil"} <= set(df.columns):
+        huge_dilution = df["Total_Dil"] > df["Total_Dil"].quantile(0.95)
+        rules = rules.mask((rules == "") & (df["Total_SCE"] <= 0) & huge_dilution, "No losses with top-5% dilution")
+    return rules
+
+
+def score_anomalies(df, by="Hole_Size", columns=ANOMALY_COLUMNS, threshold=ANOMALY_THRESHOLD, model=None):
+    """Add ``Anomaly_Score``, ``Anomaly_Reason`` and ``Is_Outlier`` columns.
+
+    Each column gets a modified z-score within each ``by`` group, scaled by
+    the MAD or, where a spike of repeated values shrinks it, the IQR; a
+    group where over half the rows share one value (MAD 0) isn't scored on
+    that column. A row is the largest of its scores, so the cut-off is
+    raised for the number of columns (Bonferroni) and, for heavy-tailed
+    columns, to that column's top ``ANOMALY_TAIL / len(columns)`` share.
+    Scores are rescaled so ``ANOMALY_THRESHOLD`` remains that cut-off, and
+    the rows it flags stay within ``ANOMALY_TAIL`` however many columns are
+    scored. The reason names the column that produced the score. Rows
+    breaking a physical rule score ``inf``. ``Is_Outlier`` applies
+    ``threshold``; views can apply their own cut-off to the stored score
+    without rescoring. ``model="iforest"`` adds an ``Anomaly_IForest``
+    score from scikit-learn's IsolationForest and flags its top 1% as well.
+    """
+    columns = [col for col in columns if col in df.columns]
+    values = df[columns].astype(float)
+    groups = df[by] if by in df.columns else pd.Series(0, index=df.index)
+    grouped = values.groupby(groups, dropna=False)
+    deviation = values - grouped.transform("median")
+    mad = deviation.abs().groupby(groups, dropna=False).transform("median")
+    iqr = grouped.transform("quantile", 0.75) - grouped.transform("quantile", 0.25)
+    scale = np.maximum(mad / 0.6745, iqr / 1.349).where(mad > 0)
+    z = (deviation / scale).abs()
+
+    bonferroni = math.sqrt(ANOMALY_THRESHOLD ** 2 + 2 * math.log(max(len(columns), 1)))
+    cutoff = z.quantile(1 - ANOMALY_TAIL / max(len(columns), 1)).clip(lower=bonferroni).fillna(bonferroni)
+    z = z * (ANOMALY_THRESHOLD / cutoff)
+
+    score = z.max(axis=1, skipna=True).fillna(0.0).round(2)
+    reason = z.fillna(-1).idxmax(axis=1)
+    rules = _rule_violations(df)
+    score = score.mask(rules != "", np.inf)
+    out = df.assign(
+        Anomaly_Score=score,
+        Anomaly_Reason=rules.where(rules != "", reason).where(score > 0, ""),
+        Is_Outlier=score > threshold,
+    )
+
+    if model == "iforest":
+        try:
+            from sklearn.ensemble import IsolationForest
+        except ImportError as e:
+            raise ImportError("RIG_ANOMALY_MODEL=iforest needs the 'scikit-learn' package installed") from e
+        features = (deviation / scale.where(scale > 0)).fillna(0.0).clip(-50, 50).to_numpy()
+        forest = IsolationForest(n_estimators=200, contamination=0.01, random_state=0).fit(features)
+        iforest = -forest.score_samples(features)
+        flagged = forest.predict(features) == -1
+        out["Anomaly_IForest"] = iforest.round(4)
+        out["Is_Outlier"] = out["Is_Outlier"] | flagged
+        out["Anomaly_Reason"] = out["Anomaly_Reason"].mask(flagged & (out["Anomaly_Reason"] == ""), "Isolation forest")
+    return out
@@ -0,0 +1,231 @@
+"""Read-only JSON API over the dashboard aggregations.
+
+Serves the numbers the dashboard shows, with the same filter semantics:
+every endpoint accepts the ``FilterState`` query parameters (``search``,
+``operator``, ``contractor``, ``shaker``, ``hole_size``, ``regime``,
+``int_range=lo,hi``, ``amw_range``, ``lgs_range``, ``td_year``, ``td_month``,
+``max_anomaly``). KPI columns from ``kpis.json`` can be compared and ranked on.
+
+    GET /api/version
+    GET /api/metrics                       Key Metrics
+    GET /api/derrick-comparison?metrics=DSRE,ROP,Total_Dil
+    GET /api/efficiency-ranking?limit=50&kpi=Efficiency%20Score
+
+Responses are cached in memory per (data version + KPI definitions, endpoint,
+canonical query),
+carry an ETag derived from the same key (so ``If-None-Match`` is answered with
+a 304 without touching the data) and are gzip-compressed when the client
+accepts it. Run standalone with ``python api.py --port 8502`` or alongside the
+dashboard by setting ``RIG_API_PORT``.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import math
+import os
+import sys
+import threading
+from collections import OrderedDict
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from analytics import ANOMALY_INPUTS, COMPARE_COLUMNS, derrick_comparison, efficiency_ranking, score_anomalies
+from backends import DEFAULT_DATA_PATH, FilterState, data_version, open_backend
+from kpis import KPIS_PATH, definitions_key, load_kpis
+
+KEY_METRICS = ["Total_Dil", "Total_SCE", "DSRE"]
+
+
+def _clean(value):
+    """Make pandas output JSON-safe: NaN/inf become null."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _clean(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_clean(item) for item in value]
+    if hasattr(value, "item"):  # NumPy scalars
+        return _clean(value.item())
+    return value
+
+
+class DashboardAPI:
+    """Routes requests to aggregations and caches the encoded responses.
+
+    ``provider`` is an optional callable returning ``(version, backend)``,
+    e.g. ``startup.open_data`` so the API shares the dashboard's loaded
+    backend; by default the API opens ``path`` itself.
+    """
+
+    def __init__(self, path=DEFAULT_DATA_PATH, kind="pandas", anomaly_model=None, cache_size=256, provider=None):
+        self.path = path
+        self.kind = kind
+        self.anomaly_model = anomaly_model
+        self.cache_size = cache_size
+        self.provider = provider
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._data_version = None
+        self._source = None
+        self._backend = None
+        self.routes = {
+            "/api/version": self.version,
+            "/api/metrics": self.metrics,
+            "/api/derrick-comparison": self.derrick_comparison,
+            "/api/efficiency-ranking": self.efficiency_ranking,
+        }
+
+    def backend(self):
+        """The backend for the current data version and KPI definitions, rebuilt when either changes."""
+        if self.provider is not None:
+            version, backend = self.provider()
+            with self._lock:
+                if version != self._version:
+                    self._version = version
+                    self._cache.clear()
+            return backend, version
+        data = data_version(self.path)
+        kpis = tuple(load_kpis(KPIS_PATH).items())
+        version = f"{data}-{definitions_key(kpis)}"
+        with self._lock:
+            if version != self._version:
+                if data != self._data_version:
+                    self._source = open_backend(self.kind, self.path,
+                                                score=partial(score_anomalies, model=self.anomaly_model),
+                                                score_inputs=ANOMALY_INPUTS)
+                    self._data_version = data
+                self._backend = self._source.with_kpis(kpis)
+                self._version = version
+                self._cache.clear()
+            return self._backend, version
+
+    # ---------- endpoints ----------
+    def version(self, backend, state, params):
+        return {"data_version": self._version, "backend": backend.name}
+
+    def metrics(self, backend, state, params):
+        means = backend.aggregate(state, KEY_METRICS).iloc[0].to_dict()
+        return {
+            "rows": backend.count(state),
+            "avg_total_dilution": means.get("Total_Dil"),
+            "avg_sce": means.get("Total_SCE"),
+            "avg_dsre": means.get("DSRE"),
+        }
+
+    def derrick_comparison(self, backend, state, params):
+        metrics = params.get("metrics", ",".join(["DSRE", "ROP", "Total_Dil"])).split(",")
+        kpis = set(load_kpis(KPIS_PATH)) & set(backend.columns())
+        metrics = [m for m in metrics if m in COMPARE_COLUMNS or m in kpis]
+        rows = backend.rows(state, columns=["flowline_Shakers"] + metrics)
+        return {"metrics": derrick_comparison(rows, metrics).to_dict(orient="records")}
+
+    def efficiency_ranking(self, backend, state, params):
+        limit = int(params.get("limit", 100))
+        kpi = params.get("kpi", "Efficiency Score")
+        if kpi not in backend.columns():
+            raise ValueError(f"Unknown KPI: {kpi}")
+        rows = backend.rows(state, columns=["Well_Name", "Canonical_Well", "flowline_Shakers", kpi])
+        if "Canonical_Well" in rows.columns:  # duplicate wells ranked under their resolved name
+            rows = rows.assign(Well_Name=rows["Canonical_Well"])
+        return {"wells": efficiency_ranking(rows, kpi).head(limit).to_dict(orient="records")}
+
+    # ---------- request handling ----------
+    def respond(self, url, if_none_match=None, accept_gzip=False):
+        """Return ``(status, headers, body)`` for a GET of ``url``."""
+        parts = urlsplit(url)
+        route = self.routes.get(parts.path.rstrip("/"))
+        if route is None:
+            return 404, {"Content-Type": "application/json"}, b'{"error": "not found"}'
+        params = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        try:
+            state = FilterState.from_params(params)
+        except (TypeError, ValueError) as e:
+            return 400, {"Content-Type": "application/json"}, json.dumps({"error": str(e)}).encode()
+
+        backend, version = self.backend()
+        extras = {key: value for key, value in params.items() if key not in vars(state)}
+        canonical = json.dumps([parts.path.rstrip("/"), sorted(state.to_params().items()), sorted(extras.items())])
+        key = hashlib.sha1(f"{version}:{canonical}".encode()).hexdigest()
+        etag = f'"{key[:20]}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return 304, headers, b""
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+        if cached is None:
+            try:
+                payload = _clean(route(backend, state, params))
+            except ValueError as e:  # bad endpoint parameters
+                return 400, {"Content-Type": "application/json"}, json.dumps({"error": str(e)}).encode()
+            body = json.dumps(payload, allow_nan=False).encode()
+            cached = (body, gzip.compress(body, compresslevel=6))
+            with self._lock:
+                self._cache[key] = cached
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        headers["Content-Type"] = "application/json"
+        if accept_gzip:
+            headers["Content-Encoding"] = "gzip"
+            return 200, headers, cached[1]
+        return 200, headers, cached[0]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    api = None
+
+    def do_GET(self):
+        accept = self.headers.get("Accept-Encoding", "")
+        status, headers, body = self.api.respond(
+            self.path, if_none_match=self.headers.get("If-None-Match"), accept_gzip="gzip" in accept,
+        )
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(port, api, host="127.0.0.1"):
+    handler = type("Handler", (_Handler,), {"api": api})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve_in_background(port, api, host="127.0.0.1"):
+    """Start the API on a daemon thread; used when running next to the dashboard."""
+    server = make_server(port, api, host)
+    threading.Thread(target=server.serve_forever, name="rig-api", daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--data", default=os.environ.get("RIG_DATA", DEFAULT_DATA_PATH))
+    parser.add_argument("--backend", default=os.environ.get("RIG_BACKEND", "pandas").lower())
+    args = parser.parse_args(argv)
+
+    api = DashboardAPI(args.data, args.backend, anomaly_model=os.environ.get("RIG_ANOMALY_MODEL"))
+    server = make_server(args.port, api, args.host)
+    print(f"Serving dashboard API on http://{args.host}:{args.port}/api/metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
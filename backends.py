@@ -0,0 +1,577 @@
+"""Query backends for the rig comparison dashboard.
+
+The dashboard describes what the user picked as a ``FilterState``; a backend
+turns that state into filtered rows or aggregates.
+
+- ``PandasBackend`` filters an in-memory frame. It is the default and is the
+  right choice for the merged CSV we ship.
+- ``SQLBackend`` compiles the same state into SQL against an embedded engine
+  (stdlib ``sqlite3`` or DuckDB when installed) over the local CSV/Parquet, so
+  only aggregated results are pulled into Python and datasets larger than RAM
+  stay usable.
+
+Pick one with ``RIG_BACKEND=pandas|sqlite|duckdb`` and point at the data with
+``RIG_DATA`` (see ``open_backend``).
+"""
+import copy
+import hashlib
+import json
+import operator
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+
+import pandas as pd
+
+from kpis import add_kpis, compile_kpis, definitions_key
+from regimes import REGIME_FEATURES, RegimeError, add_regimes, assign_regimes, fit_regimes
+from wells import IDENTITY_COLUMNS, add_well_ids, resolve_wells
+
+DEFAULT_DATA_PATH = "Updated_Merged_Data_with_API_and_Location.csv"
+TABLE = "wells"
+# Part of the sidecar's version key: bump when ingestion adds or changes derived
+# columns so existing sidecars are rebuilt. 1: Well_ID and Canonical_Well from
+# duplicate-well resolution; 2: Regime; 3: TD_Year/TD_Month from ISO dates too;
+# 4: Anomaly_Score, Anomaly_Reason and Is_Outlier from the ``score`` callable.
+SIDECAR_SCHEMA = 4
+# TD_Date mixes day-first dates ("13-08-2017") with ISO timestamps ("2019-10-01 00:00:00").
+DATE_FORMAT = "%d-%m-%Y"
+
+MONTHS = ["January", "February", "March", "April", "May", "June",
+          "July", "August", "September", "October", "November", "December"]
+
+# Widget-facing column names for each categorical filter, in cascade order.
+CASCADE = [
+    ("operator", "Operator"),
+    ("contractor", "Contractor"),
+    ("shaker", "flowline_Shakers"),
+    ("hole_size", "Hole_Size"),
+    ("regime", "Regime"),
+]
+RANGES = [
+    ("int_range", "IntLength"),
+    ("amw_range", "AMW"),
+    ("lgs_range", "Average_LGS%"),
+]
+_RANGE_FIELDS = {field for field, _ in RANGES}
+# How each query-string value is parsed back; Hole_Size and TD_Year are numeric in the data.
+_FIELD_TYPES = {
+    "search": str, "operator": str, "contractor": str, "shaker": str, "hole_size": float, "regime": str,
+    "int_range": "range", "amw_range": "range", "lgs_range": "range",
+    "td_year": int, "td_month": str, "max_anomaly": float,
+}
+AGGREGATES = {"mean": "AVG", "min": "MIN", "max": "MAX", "sum": "SUM", "count": "COUNT"}
+# Operators accepted in a ``count(state, where=(column, op, value))`` condition.
+COMPARISONS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+
+def _number(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+@dataclass(frozen=True)
+class FilterState:
+    """Everything the filter bar and Advanced tab can narrow the data by.
+
+    ``None`` means "All" / not applied. Ranges are inclusive ``(low, high)``.
+    ``max_anomaly`` drops rows whose stored ``Anomaly_Score`` is above it.
+    """
+    search: str = ""
+    operator: object = None
+    contractor: object = None
+    shaker: object = None
+    hole_size: object = None
+    regime: str = None
+    int_range: tuple = None
+    amw_range: tuple = None
+    lgs_range: tuple = None
+    td_year: int = None
+    td_month: str = None
+    max_anomaly: float = None
+
+    def to_params(self):
+        """Flat ``{name: str}`` form for URLs; unset filters are left out."""
+        params = {}
+        for name, value in vars(self).items():
+            if value is None or value == "":
+                continue
+            if name in _RANGE_FIELDS:
+                params[name] = f"{_number(value[0])},{_number(value[1])}"
+            else:
+                params[name] = _number(value) if isinstance(value, float) else str(value)
+        return params
+
+    def key(self):
+        """Canonical hash of the state: equal filters give equal keys however they were spelled."""
+        canonical = json.dumps(sorted(self.to_params().items()))
+        return hashlib.sha1(canonical.encode()).hexdigest()[:16]
+
+    @classmethod
+    def from_params(cls, params):
+        """Inverse of ``to_params``; unknown keys are ignored."""
+        kwargs = {}
+        for name, value in params.items():
+            if isinstance(value, list):  # parse_qs style
+                value = value[-1]
+            if name not in _FIELD_TYPES or value == "":
+                continue
+            kind = _FIELD_TYPES[name]
+            if kind == "range":
+                low, high = value.split(",")
+                kwargs[name] = (float(low), float(high))
+            else:
+                kwargs[name] = kind(value)
+        return cls(**kwargs)
+
+
+def data_version(path):
+    """Cheap fingerprint of a data file, used to key every per-data cache."""
+    stat = os.stat(path)
+    raw = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:12]
+
+
+def parse_dates(series):
+    """``TD_Date`` as datetimes, whichever of its two formats each value uses.
+
+    Parsing with an inferred format would take it from the first value and
+    drop (or, day-first, swap day and month of) every value in the other.
+    """
+    iso = pd.to_datetime(series, format="ISO8601", errors="coerce")
+    return iso.fillna(pd.to_datetime(series, format=DATE_FORMAT, errors="coerce"))
+
+
+def prepare_frame(df):
+    """Apply the load-time cleanup every dashboard view relies on."""
+    if "Efficiency Score" in df.columns and df["Efficiency Score"].isnull().all():
+        df = df.drop(columns=["Efficiency Score"])
+    if "TD_Date" in df.columns:
+        td = parse_dates(df["TD_Date"])
+        df = df.assign(TD_Year=td.dt.year, TD_Month=td.dt.strftime("%B"))
+    return df
+
+
+def read_data(path):
+    """Read the merged CSV (or a Parquet export) into a prepared frame with well ids and regimes."""
+    if str(path).endswith(".parquet"):
+        return add_regimes(add_well_ids(prepare_frame(pd.read_parquet(path))))
+    return add_regimes(add_well_ids(prepare_frame(pd.read_csv(path))))
+
+
+def _read_chunks(path, chunksize, columns=None):
+    """Iterate ``path`` in frames of ``chunksize`` rows, optionally only ``columns`` that exist."""
+    if str(path).endswith(".parquet"):
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(path)
+        if columns is not None:
+            columns = [col for col in columns if col in parquet.schema_arrow.names]
+        return (batch.to_pandas() for batch in parquet.iter_batches(batch_size=chunksize, columns=columns))
+    usecols = None if columns is None else (lambda col: col in columns)
+    return pd.read_csv(path, chunksize=chunksize, usecols=usecols)
+
+
+def regime_model(path, chunksize=100_000):
+    """Fit performance regimes over ``path`` reading only the feature columns, chunk by chunk."""
+    try:
+        return fit_regimes(lambda: _read_chunks(path, chunksize, REGIME_FEATURES))
+    except RegimeError:
+        return None
+
+
+def well_ids(path):
+    """``resolve_wells`` over just the identity columns of ``path``, one row per file row.
+
+    Entity resolution needs every row at once, so chunked SQL ingestion reads
+    these few columns up front instead of the whole file.
+    """
+    if str(path).endswith(".parquet"):
+        import pyarrow.parquet as pq
+        names = pq.ParquetFile(path).schema_arrow.names
+        identity = pd.read_parquet(path, columns=[col for col in IDENTITY_COLUMNS if col in names])
+    else:
+        identity = pd.read_csv(path, usecols=lambda col: col in IDENTITY_COLUMNS)
+    if "Well_Name" not in identity.columns:
+        return None
+    return resolve_wells(identity)
+
+
+def score_columns(path, score, inputs=None):
+    """The columns ``score`` adds, over ``path`` read whole but only its ``inputs`` columns.
+
+    Scores compare each row with the rest of the file, so like ``well_ids``
+    chunked SQL ingestion computes them up front. ``None`` reads every column.
+    """
+    frame = prepare_frame(pd.concat(_read_chunks(path, 100_000, inputs), ignore_index=True))
+    scored = score(frame)
+    return scored[[col for col in scored.columns if col not in frame.columns]].reset_index(drop=True)
+
+
+def _score_key(score, inputs):
+    """Stable name for a scoring callable (a function or ``functools.partial``) and its inputs."""
+    if score is None:
+        return "unscored"
+    func = getattr(score, "func", score)
+    options = json.dumps([getattr(score, "keywords", {}), inputs], sort_keys=True, default=str)
+    return f"{func.__module__}.{func.__qualname__}:{hashlib.sha1(options.encode()).hexdigest()[:8]}"
+
+
+def product_column(a, b):
+    """Name of the ``a * b`` sum in ``cross_products`` output."""
+    return f"{a}*{b}"
+
+
+def cross_products(df, columns, by, center=None):
+    """Per ``by`` group, over rows where ``by`` and every column are present:
+    ``n``, the sum of each column and the sum of every product of two of
+    them (squares included, see ``product_column``).
+
+    Enough to fit least squares or compare means and variances between
+    groups without the rows themselves. ``center`` maps columns to an offset
+    subtracted before summing; anything near the mean keeps the sums of
+    squares from cancelling.
+    """
+    columns = [col for col in columns if col in df.columns]
+    center = center or {}
+    frame = df[[by] + columns].dropna()
+    sums = {"n": pd.Series(1.0, index=frame.index)}
+    for col in columns:
+        sums[col] = frame[col].astype(float) - center.get(col, 0.0)
+    for i, a in enumerate(columns):
+        for b in columns[i:]:
+            sums[product_column(a, b)] = sums[a] * sums[b]
+    return pd.DataFrame(sums).groupby(frame[by], sort=True).sum().reset_index()
+
+
+class PandasBackend:
+    """Filters and aggregates an in-memory DataFrame."""
+
+    name = "pandas"
+
+    def __init__(self, data):
+        self.data = data
+        self._search_text = None
+        self.kpi_errors = {}
+
+    def with_kpis(self, definitions):
+        """A backend over the same rows plus a column per valid KPI; invalid ones land in ``kpi_errors``."""
+        kpis, errors = compile_kpis(definitions, self.columns())
+        backend = PandasBackend(add_kpis(self.data, kpis))
+        backend.kpi_errors = errors
+        return backend
+
+    def warm(self):
+        """Build the lazy search index ahead of the first query."""
+        if self._search_text is None:
+            # Lower-cased string view of every column, built once per backend.
+            self._search_text = {col: self.data[col].astype(str).str.lower() for col in self.data.columns}
+
+    def _search_mask(self, term):
+        self.warm()
+        mask = pd.Series(False, index=self.data.index)
+        for text in self._search_text.values():
+            mask |= text.str.contains(term, regex=False)
+        return mask
+
+    def mask(self, state):
+        df = self.data
+        mask = pd.Series(True, index=df.index)
+        if state.search:
+            mask &= self._search_mask(state.search.lower())
+        for field, column in CASCADE:
+            value = getattr(state, field)
+            if value is not None and column in df.columns:
+                mask &= df[column] == value
+        for field, column in RANGES:
+            bounds = getattr(state, field)
+            if bounds is not None and column in df.columns:
+                mask &= df[column].between(bounds[0], bounds[1])
+        if state.td_year is not None and "TD_Year" in df.columns:
+            mask &= df["TD_Year"] == state.td_year
+        if state.td_month is not None and "TD_Month" in df.columns:
+            mask &= df["TD_Month"] == state.td_month
+        if state.max_anomaly is not None and "Anomaly_Score" in df.columns:
+            mask &= df["Anomaly_Score"] <= state.max_anomaly
+        return mask
+
+    def columns(self):
+        return list(self.data.columns)
+
+    def rows(self, state, columns=None, limit=None):
+        df = self.data[self.mask(state)]
+        if columns is not None:
+            df = df[[col for col in columns if col in df.columns]]
+        return df if limit is None else df.head(limit)
+
+    def count(self, state, where=None):
+        """Rows matching ``state`` and, optionally, a ``(column, op, value)`` condition."""
+        mask = self.mask(state)
+        if where is not None:
+            column, op, value = where
+            if column not in self.data.columns:
+                return 0
+            mask &= COMPARISONS[op](self.data[column], value)
+        return int(mask.sum())
+
+    def options(self, column, state):
+        if column not in self.data.columns:
+            return []
+        values = self.data.loc[self.mask(state), column].dropna().unique().tolist()
+        return sorted(values)
+
+    def bounds(self, column):
+        series = self.data[column]
+        return series.min(), series.max()
+
+    def aggregate(self, state, columns, how="mean", by=None):
+        """One row of ``how``-aggregates, or one row per ``by`` group."""
+        columns = [col for col in columns if col in self.data.columns]
+        df = self.data.loc[self.mask(state), ([by] if by else []) + columns]
+        if by is None:
+            return df[columns].agg(how).to_frame().T.reset_index(drop=True)
+        return df.groupby(by, dropna=True)[columns].agg(how).reset_index()
+
+    def cross_products(self, state, columns, by, center=None):
+        """``cross_products`` over the rows matching ``state``."""
+        return cross_products(self.data[self.mask(state)], columns, by, center)
+
+
+def _quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+class SQLBackend:
+    """Compiles ``FilterState`` into SQL run by an embedded engine.
+
+    ``engine`` is ``"sqlite"`` (stdlib; the file is ingested once in chunks
+    into a sidecar ``.sqlite`` database) or ``"duckdb"`` (queries the CSV or
+    Parquet file in place). ``score`` adds columns the way it does for
+    ``open_backend``, computed once from the ``score_inputs`` columns.
+    """
+
+    def __init__(self, path, engine="sqlite", chunksize=100_000, score=None, score_inputs=None):
+        self.path = path
+        self.name = engine
+        self.kpi_errors = {}
+        self._table = TABLE
+        self._lock = threading.Lock()
+        if engine == "duckdb":
+            self.conn = self._open_duckdb(path, score, score_inputs)
+        elif engine == "sqlite":
+            self.conn = self._open_sqlite(path, chunksize, score, score_inputs)
+        else:
+            raise ValueError(f"Unknown SQL engine: {engine}")
+        self._columns = self._query_columns()
+
+    # ---------- connection setup ----------
+    @staticmethod
+    def _open_duckdb(path, score=None, score_inputs=None):
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError("RIG_BACKEND=duckdb needs the 'duckdb' package installed") from e
+        conn = duckdb.connect()
+        escaped = str(path).replace("'", "''")
+        source = f"read_parquet('{escaped}')" if str(path).endswith(".parquet") else f"read_csv_auto('{escaped}')"
+        derived = [well_ids(path)]
+        model = regime_model(path)
+        if model is not None:
+            derived.append(pd.concat([assign_regimes(chunk, model).astype(str)
+                                      for chunk in _read_chunks(path, 100_000, REGIME_FEATURES)], ignore_index=True))
+        if score is not None:
+            derived.append(score_columns(path, score, score_inputs))
+        derived = [part.reset_index(drop=True) for part in derived if part is not None]
+        if derived:
+            # Resolved ids, regimes and scores line up with the file's row order.
+            extra = pd.concat(derived, axis=1)
+            conn.register("_derived", extra.rename_axis("_row").reset_index())
+            picked = ", ".join(f"extra.{_quote(col)}" for col in extra.columns)
+            source = f"""(SELECT src.* EXCLUDE (_row), {picked}
+                          FROM (SELECT *, row_number() OVER () - 1 AS _row FROM {source}) src
+                          LEFT JOIN _derived extra USING (_row))"""
+        td = """coalesce(try_cast(CAST("TD_Date" AS VARCHAR) AS TIMESTAMP),
+                         try_strptime(CAST("TD_Date" AS VARCHAR), '%d-%m-%Y'))"""
+        conn.execute(f"""
+            CREATE VIEW {TABLE} AS
+            SELECT *, year({td}) AS "TD_Year", monthname({td}) AS "TD_Month"
+            FROM {source}
+        """)
+        return conn
+
+    @staticmethod
+    def _open_sqlite(path, chunksize, score=None, score_inputs=None):
+        db_path = os.path.splitext(path)[0] + ".sqlite"
+        version = f"{data_version(path)}:{SIDECAR_SCHEMA}:{_score_key(score, score_inputs)}"
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        conn.execute("CREATE TABLE IF NOT EXISTS _meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = conn.execute("SELECT value FROM _meta WHERE key = 'data_version'").fetchone()
+        if row is None or row[0] != version:
+            conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+            ids = well_ids(path)
+            model = regime_model(path, chunksize)
+            scores = score_columns(path, score, score_inputs) if score is not None else None
+            offset = 0
+            for chunk in _read_chunks(path, chunksize):
+                chunk = prepare_frame(chunk)
+                if ids is not None:
+                    chunk = chunk.assign(**ids.iloc[offset:offset + len(chunk)].set_axis(chunk.index))
+                if model is not None:
+                    chunk = chunk.assign(Regime=assign_regimes(chunk, model).astype(str))
+                if scores is not None:
+                    chunk = chunk.assign(**scores.iloc[offset:offset + len(chunk)].set_axis(chunk.index))
+                offset += len(chunk)
+                chunk.to_sql(TABLE, conn, if_exists="append", index=False)
+            indexed = [column for _, column in CASCADE] + (["Well_ID"] if ids is not None else [])
+            for column in indexed:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {_quote('ix_' + column)} ON {TABLE} ({_quote(column)})")
+            conn.execute("INSERT OR REPLACE INTO _meta VALUES ('data_version', ?)", (version,))
+            conn.commit()
+        return conn
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            cursor = self.conn.execute(sql, list(params))
+            names = [d[0] for d in cursor.description]
+            return pd.DataFrame(cursor.fetchall(), columns=names)
+
+    def warm(self):
+        """Nothing to build: indexes are created when the data is ingested."""
+
+    def with_kpis(self, definitions):
+        """Same contract as ``PandasBackend.with_kpis``: KPIs become computed columns of a temporary view."""
+        kpis, errors = compile_kpis(definitions, self._columns)
+        backend = copy.copy(self)  # shares the connection and its lock
+        backend.kpi_errors = errors
+        if kpis:
+            backend._table = f"{TABLE}_kpis_{definitions_key(definitions)}"
+            select = ", ".join(f"{kpi.sql(_quote)} AS {_quote(kpi.name)}" for kpi in kpis)
+            with self._lock:
+                self.conn.execute(f"CREATE TEMP VIEW IF NOT EXISTS {backend._table} AS "
+                                  f"SELECT *, {select} FROM {self._table}")
+            backend._columns = backend._query_columns()
+        return backend
+
+    def _query_columns(self):
+        return list(self._execute(f"SELECT * FROM {self._table} LIMIT 0").columns)
+
+    # ---------- query compilation ----------
+    def where(self, state):
+        """Compile ``state`` into a ``WHERE`` clause and its parameters."""
+        clauses, params = [], []
+        if state.search:
+            text = "VARCHAR" if self.name == "duckdb" else "TEXT"
+            ors = [f"LOWER(CAST({_quote(col)} AS {text})) LIKE ?" for col in self._columns]
+            clauses.append("(" + " OR ".join(ors) + ")")
+            params += [f"%{state.search.lower()}%"] * len(ors)
+        for field, column in CASCADE:
+            value = getattr(state, field)
+            if value is not None and column in self._columns:
+                clauses.append(f"{_quote(column)} = ?")
+                params.append(value)
+        for field, column in RANGES:
+            bounds = getattr(state, field)
+            if bounds is not None and column in self._columns:
+                clauses.append(f"{_quote(column)} BETWEEN ? AND ?")
+                params += [bounds[0], bounds[1]]
+        if state.td_year is not None and "TD_Year" in self._columns:
+            clauses.append('"TD_Year" = ?')
+            params.append(int(state.td_year))
+        if state.td_month is not None and "TD_Month" in self._columns:
+            clauses.append('"TD_Month" = ?')
+            params.append(state.td_month)
+        if state.max_anomaly is not None and "Anomaly_Score" in self._columns:
+            clauses.append('"Anomaly_Score" <= ?')
+            params.append(float(state.max_anomaly))
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def columns(self):
+        return list(self._columns)
+
+    def rows(self, state, columns=None, limit=None):
+        where, params = self.where(state)
+        select = "*" if columns is None else ", ".join(_quote(c) for c in columns if c in self._columns)
+        sql = f"SELECT {select} FROM {self._table}{where}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return self._execute(sql, params)
+
+    def count(self, state, where=None):
+        """Same contract as ``PandasBackend.count``."""
+        clause, params = self.where(state)
+        if where is not None:
+            column, op, value = where
+            if column not in self._columns:
+                return 0
+            if op not in COMPARISONS:
+                raise KeyError(op)
+            clause += (" AND " if clause else " WHERE ") + f"{_quote(column)} {op} ?"
+            params = params + [value]
+        return int(self._execute(f"SELECT COUNT(*) AS n FROM {self._table}{clause}", params)["n"].iloc[0])
+
+    def options(self, column, state):
+        if column not in self._columns:
+            return []
+        where, params = self.where(state)
+        col = _quote(column)
+        sql = f"SELECT DISTINCT {col} FROM {self._table}{where}"
+        sql += (" AND " if where else " WHERE ") + f"{col} IS NOT NULL ORDER BY {col}"
+        return self._execute(sql, params)[column].tolist()
+
+    def bounds(self, column):
+        col = _quote(column)
+        row = self._execute(f"SELECT MIN({col}) AS lo, MAX({col}) AS hi FROM {self._table}").iloc[0]
+        return row["lo"], row["hi"]
+
+    def aggregate(self, state, columns, how="mean", by=None):
+        """Same contract as ``PandasBackend.aggregate``, computed in the engine."""
+        func = AGGREGATES[how]
+        columns = [col for col in columns if col in self._columns]
+        where, params = self.where(state)
+        select = ", ".join(f"{func}({_quote(c)}) AS {_quote(c)}" for c in columns)
+        if by is None:
+            result = self._execute(f"SELECT {select} FROM {self._table}{where}", params)
+        else:
+            group = _quote(by)
+            where += (" AND " if where else " WHERE ") + f"{group} IS NOT NULL"
+            result = self._execute(
+                f"SELECT {group}, {select} FROM {self._table}{where} GROUP BY {group} ORDER BY {group}", params
+            )
+        # Empty selections come back as NULL; match pandas' NaN.
+        result[columns] = result[columns].astype(float)
+        return result
+
+    def cross_products(self, state, columns, by, center=None):
+        """Same contract as ``PandasBackend.cross_products``, summed in the engine."""
+        columns = [col for col in columns if col in self._columns]
+        center = center or {}
+        where, params = self.where(state)
+        group = _quote(by)
+        present = " AND ".join(f"{_quote(c)} IS NOT NULL" for c in [by] + columns)
+        where += (" AND " if where else " WHERE ") + present
+        # Offsets are inlined: the SELECT list comes before the WHERE parameters.
+        value = {col: f"(CAST({_quote(col)} AS DOUBLE) - {float(center.get(col, 0.0))!r})" for col in columns}
+        sums = ["COUNT(*) AS n"] + [f"SUM({value[col]}) AS {_quote(col)}" for col in columns]
+        sums += [
+            f"SUM({value[a]} * {value[b]}) AS {_quote(product_column(a, b))}"
+            for i, a in enumerate(columns) for b in columns[i:]
+        ]
+        result = self._execute(
+            f"SELECT {group}, {', '.join(sums)} FROM {self._table}{where} GROUP BY {group} ORDER BY {group}", params
+        )
+        result[result.columns[1:]] = result[result.columns[1:]].astype(float)
+        return result
+
+
+def open_backend(kind, path, score=None, score_inputs=None):
+    """Build the backend named ``kind`` (``pandas``, ``sqlite`` or ``duckdb``) over ``path``.
+
+    ``score`` is an optional callable run once at load that returns the
+    frame with columns added, e.g. anomaly scoring. SQL backends run it over
+    just the ``score_inputs`` columns of the whole file and store the added
+    columns alongside the rows.
+    """
+    if kind == "pandas":
+        data = read_data(path)
+        return PandasBackend(score(data) if score else data)
+    return SQLBackend(path, engine=kind, score=score, score_inputs=score_inputs)
@@ -0,0 +1,77 @@
+"""Scatter charts that stay responsive at any row count.
+
+- Points are drawn with WebGL (``render_mode="webgl"``) instead of SVG.
+- Colour comes from a bucketed category (Operator, shaker family, ...): the
+  largest ``MAX_COLOR_GROUPS`` levels keep their name and the rest become
+  "Other", so the number of traces is bounded whatever the number of wells.
+- Above ``MAX_POINTS`` rows the points are decimated on the server. Rows are
+  binned on an x/y grid and every occupied cell keeps the same fraction of its
+  points (at least one), so dense regions stay dense and lone outliers survive.
+- ``density_heatmap`` bins all the points with NumPy and ships only the grid.
+"""
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+MAX_COLOR_GROUPS = 10
+MAX_POINTS = 20_000
+GRID_BINS = 120
+
+
+def bucket(values, top=MAX_COLOR_GROUPS, other="Other"):
+    """Keep the ``top`` most frequent levels of ``values``; everything else becomes ``other``."""
+    values = values.astype("string").fillna("Unknown")
+    keep = values.value_counts().index[:top]
+    return values.where(values.isin(keep), other)
+
+
+def _cells(df, x, y, bins):
+    codes = []
+    for col in (x, y):
+        v = df[col].to_numpy(dtype=float)
+        lo, hi = np.nanmin(v), np.nanmax(v)
+        scale = bins / (hi - lo) if hi > lo else 0.0
+        codes.append(np.clip(((v - lo) * scale).astype(int), 0, bins - 1))
+    return codes[0] * bins + codes[1]
+
+
+def decimate(df, x, y, max_points=MAX_POINTS, bins=GRID_BINS, seed=0):
+    """At most about ``max_points`` rows of ``df``, sampled evenly within x/y grid cells.
+
+    Rows with a missing ``x`` or ``y`` can't be plotted and are dropped.
+    """
+    df = df.dropna(subset=[x, y])
+    if len(df) <= max_points:
+        return df
+    cell = _cells(df, x, y, bins)
+    counts = np.bincount(cell, minlength=bins * bins)
+    quota = np.where(counts > 0, np.maximum(1, np.round(counts * max_points / len(df))), 0)
+    # Random rank of each row within its cell; keep the first ``quota`` of every cell.
+    rng = np.random.default_rng(seed)
+    order = np.lexsort((rng.random(len(df)), cell))
+    starts = np.concatenate([[0], np.cumsum(counts)])[cell[order]]
+    rank = np.empty(len(df), dtype=np.int64)
+    rank[order] = np.arange(len(df)) - starts
+    return df[rank < quota[cell]]
+
+
+def scatter(df, x, y, color, size=None, max_points=MAX_POINTS, **kwargs):
+    """WebGL scatter coloured by the bucketed ``color`` column; returns ``(figure, rows plotted)``."""
+    points = decimate(df, x, y, max_points)
+    if size is not None:
+        points = points.assign(**{size: points[size].clip(lower=0).fillna(0)})
+    points = points.assign(**{color: bucket(points[color])})
+    fig = px.scatter(points, x=x, y=y, color=color, size=size, render_mode="webgl",
+                     category_orders={color: list(points[color].value_counts().index)}, **kwargs)
+    return fig, len(points)
+
+
+def density_heatmap(df, x, y, bins=GRID_BINS, labels=None, **kwargs):
+    """2-D histogram of every row, binned server-side; ``labels`` maps column names like ``px``."""
+    labels = labels or {}
+    points = df[[x, y]].dropna().to_numpy(dtype=float)
+    counts, x_edges, y_edges = np.histogram2d(points[:, 0], points[:, 1], bins=bins)
+    grid = pd.DataFrame(counts.T, index=(y_edges[:-1] + y_edges[1:]) / 2, columns=(x_edges[:-1] + x_edges[1:]) / 2)
+    fig = px.imshow(grid.where(grid > 0), origin="lower", aspect="auto", color_continuous_scale="Viridis",
+                    labels={"x": labels.get(x, x), "y": labels.get(y, y), "color": "Rows"}, **kwargs)
+    return fig
@@ -0,0 +1,240 @@
+"""User-defined KPI columns: named arithmetic expressions over existing columns.
+
+An expression such as ``Haul_OFF / IntLength`` is parsed once with ``ast``
+and checked against a small grammar: numbers, column names, ``+ - * / **``,
+unary minus and the functions in ``FUNCTIONS``; ``fillna(x, value)`` counts
+missing inputs as ``value``. Column names that aren't
+identifiers go in backticks, as in ``DataFrame.eval``:
+``DSRE * 100 - `Discard Ratio` * 10``. Anything else (attributes, subscripts,
+comparisons, other calls) is rejected with a ``KPIError`` before it runs.
+
+A valid expression is evaluated on whole columns: with ``numexpr`` when it is
+installed, otherwise with NumPy, and the same tree is rendered as SQL for the
+SQLite/DuckDB backends. Division by zero and out-of-domain logs and square
+roots give NaN (NULL in SQL), not inf or an engine error. Definitions live in ``kpis.json`` next to the app (``RIG_KPIS`` moves
+it) on top of the built-in ``BUILTIN_KPIS``, which a saved definition of the
+same name overrides.
+"""
+import ast
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+try:
+    import numexpr
+except ImportError:  # optional: NumPy evaluates the same expressions
+    numexpr = None
+
+KPIS_PATH = os.environ.get("RIG_KPIS", "kpis.json")
+BUILTIN_KPIS = {
+    # Missing inputs count as 0, as the dashboard's original score did.
+    "Efficiency Score": "fillna(DSRE, 0) * 100 - fillna(Dilution_Ratio, 0) * 10 - fillna(`Discard Ratio`, 0) * 10",
+}
+
+
+def _fillna(values, fill):
+    return np.where(np.isfinite(values), values, fill)
+
+
+# name -> (NumPy function, SQL template over the rendered arguments, number of arguments)
+FUNCTIONS = {
+    "abs": (np.abs, "ABS({0})", 1),
+    "sqrt": (np.sqrt, "CASE WHEN {0} >= 0 THEN SQRT({0}) END", 1),
+    "log": (np.log, "CASE WHEN {0} > 0 THEN LN({0}) END", 1),
+    "exp": (np.exp, "EXP({0})", 1),
+    "fillna": (_fillna, "COALESCE({0}, {1})", 2),
+}
+_NUMEXPR_FUNCTIONS = {"abs", "sqrt", "log", "exp"}  # the rest are evaluated with NumPy
+_OPERATORS = {ast.Add: "+", ast.Sub: "-", ast.Mult: "*", ast.Div: "/", ast.Pow: "**"}
+_BACKTICK = re.compile(r"`([^`]*)`")
+_PLACEHOLDER = re.compile(r"__kpi\d+")
+_COUNTS = {1: "one argument", 2: "two arguments"}
+
+
+class KPIError(ValueError):
+    """An expression that doesn't parse, uses something outside the grammar or names an unknown column."""
+
+
+@dataclass(frozen=True)
+class KPI:
+    name: str
+    expression: str
+    columns: tuple  # source columns, in order of first use
+    tree: ast.Expression  # validated; column references are the placeholders in ``names``
+    names: dict  # placeholder -> column
+
+    def evaluate(self, df):
+        """The KPI for every row of ``df`` as a float Series."""
+        env = {name: df[column].to_numpy(dtype=float) for name, column in self.names.items()}
+        calls = {node.func.id for node in ast.walk(self.tree) if isinstance(node, ast.Call)}
+        with np.errstate(all="ignore"):
+            if numexpr is not None and calls <= _NUMEXPR_FUNCTIONS:
+                values = numexpr.evaluate(ast.unparse(self.tree), local_dict=env)
+            else:
+                values = _numpy(self.tree.body, env)
+        values = np.broadcast_to(np.asarray(values, dtype=float), (len(df),))
+        return pd.Series(np.where(np.isfinite(values), values, np.nan), index=df.index, name=self.name)
+
+    def sql(self, quote):
+        """The KPI as a SQL expression; ``quote`` renders a column name."""
+        return _sql(self.tree.body, {name: quote(col) for name, col in self.names.items()})
+
+
+def _numpy(node, env):
+    if isinstance(node, ast.Constant):
+        return float(node.value)
+    if isinstance(node, ast.Name):
+        return env[node.id]
+    if isinstance(node, ast.UnaryOp):
+        value = _numpy(node.operand, env)
+        return -value if isinstance(node.op, ast.USub) else value
+    if isinstance(node, ast.Call):
+        return FUNCTIONS[node.func.id][0](*(_numpy(arg, env) for arg in node.args))
+    left, right = _numpy(node.left, env), _numpy(node.right, env)
+    return {ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply,
+            ast.Div: np.divide, ast.Pow: np.power}[type(node.op)](left, right)
+
+
+def _sql(node, names):
+    if isinstance(node, ast.Constant):
+        return repr(float(node.value))
+    if isinstance(node, ast.Name):
+        return f"CAST({names[node.id]} AS DOUBLE)"
+    if isinstance(node, ast.UnaryOp):
+        return f"({'-' if isinstance(node.op, ast.USub) else '+'}{_sql(node.operand, names)})"
+    if isinstance(node, ast.Call):
+        return FUNCTIONS[node.func.id][1].format(*(_sql(arg, names) for arg in node.args))
+    left, right = _sql(node.left, names), _sql(node.right, names)
+    if isinstance(node.op, ast.Div):
+        return f"({left} / NULLIF({right}, 0))"
+    if isinstance(node.op, ast.Pow):
+        return f"POWER({left}, {right})"
+    return f"({left} {_OPERATORS[type(node.op)]} {right})"
+
+
+def _source(node, names):
+    """``node`` as text, with column names put back in place of placeholders."""
+    def column(match):
+        name = names.get(match.group(0), match.group(0))
+        return name if name.isidentifier() else f"`{name}`"
+    return _PLACEHOLDER.sub(column, ast.unparse(node))
+
+
+def _check(node, names, columns):
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise KPIError(f"Only numbers are allowed as constants, not {node.value!r}")
+    elif isinstance(node, ast.Name):
+        if columns is not None and names[node.id] not in columns:
+            raise KPIError(f"Unknown column: {names[node.id]!r}")
+    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        _check(node.operand, names, columns)
+    elif isinstance(node, ast.BinOp) and type(node.op) in _OPERATORS:
+        _check(node.left, names, columns)
+        _check(node.right, names, columns)
+    elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS:
+        arity = FUNCTIONS[node.func.id][2]
+        if len(node.args) != arity or node.keywords:
+            raise KPIError(f"{node.func.id}() takes exactly {_COUNTS[arity]}")
+        for arg in node.args:
+            _check(arg, names, columns)
+    else:
+        raise KPIError(f"Not allowed in a KPI: {_source(node, names)!r} "
+                       f"(use numbers, columns, + - * / ** and {', '.join(FUNCTIONS)})")
+
+
+def compile_kpi(name, expression, columns=None):
+    """Parse and validate ``expression`` against the available ``columns`` (``None``: any names)."""
+    name = str(name).strip()
+    if not name:
+        raise KPIError("A KPI needs a name")
+    if columns is not None and name in columns:
+        raise KPIError(f"{name!r} is already a column in the data")
+    # Every column reference becomes a placeholder identifier, so backticked names
+    # parse and the evaluators only ever see names they were handed.
+    placeholders = {}  # column -> placeholder
+
+    def placeholder(column):
+        return placeholders.setdefault(column, f"__kpi{len(placeholders)}")
+
+    text = _BACKTICK.sub(lambda m: placeholder(m.group(1)), str(expression)).strip()
+    try:
+        tree = ast.parse(text, mode="eval")
+    except SyntaxError as e:
+        raise KPIError(f"Can't parse {expression!r}: {e.msg}") from None
+    quoted = set(placeholders.values())
+    functions = {id(node.func) for node in ast.walk(tree) if isinstance(node, ast.Call)}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and id(node) not in functions and node.id not in quoted:
+            node.id = placeholder(node.id)
+    names = {key: column for column, key in placeholders.items()}
+    _check(tree.body, names, None if columns is None else set(columns))
+    return KPI(name, str(expression).strip(), tuple(placeholders), tree, names)
+
+
+def compile_kpis(definitions, columns):
+    """``(kpis, errors)``: the valid definitions compiled, and ``{name: message}`` for the rest."""
+    kpis, errors = [], {}
+    for name, expression in dict(definitions).items():
+        try:
+            kpis.append(compile_kpi(name, expression, columns))
+        except KPIError as e:
+            errors[name] = str(e)
+    return kpis, errors
+
+
+def add_kpis(df, kpis):
+    """``df`` with one column per compiled KPI."""
+    return df.assign(**{kpi.name: kpi.evaluate(df) for kpi in kpis})
+
+
+def definitions_key(definitions):
+    """Short hash of a set of definitions, to key caches of KPI columns."""
+    canonical = json.dumps(sorted(dict(definitions).items()))
+    return hashlib.sha1(canonical.encode()).hexdigest()[:12]
+
+
+# ---------- persistence (same layout as views.py) ----------
+def _load_saved(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_kpis(path=KPIS_PATH):
+    """``{name: expression}``: the built-ins, then saved definitions (which may override them)."""
+    saved = _load_saved(path)
+    return {**BUILTIN_KPIS, **{name: entry["expression"] for name, entry in saved.items()}}
+
+
+def _write(saved, path):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(saved, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def save_kpi(name, expression, columns, path=KPIS_PATH):
+    """Validate against ``columns`` and store; raises ``KPIError`` if the expression is invalid."""
+    kpi = compile_kpi(name, expression, columns)
+    saved = _load_saved(path)
+    saved[kpi.name] = {
+        "expression": kpi.expression,
+        "saved": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    _write(saved, path)
+    return kpi
+
+
+def delete_kpi(name, path=KPIS_PATH):
+    """Remove a saved definition; a built-in falls back to its default."""
+    saved = _load_saved(path)
+    if saved.pop(name, None) is not None:
+        _write(saved, path)
@@ -0,0 +1,181 @@
+"""Concurrent-session load test for the dashboard scripts.
+
+Drives a dashboard headlessly with Streamlit's ``AppTest``. Each simulated
+session runs a scripted interaction sequence (type a search, walk the
+Operator -> Hole Size cascade, move the sliders, use the widgets inside the
+tabs). N sessions run concurrently in one process, the way a single
+Streamlit server shares its caches and its GIL between browser tabs.
+
+Reports p50/p95/p99 rerun latency and peak RSS for capacity planning:
+
+    python loadtest.py --sessions 8 --rows 50000
+    python loadtest.py --script mapp.py --sessions 4 --rows 200000 --backend sqlite
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+import synthdata
+from backends import DEFAULT_DATA_PATH
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _widget(elements, label):
+    for element in elements:
+        if element.label == label:
+            return element
+    return None
+
+
+def _pick(element, rng):
+    """Choose a random non-"All" option, or "All" if that's all there is."""
+    choices = [opt for opt in element.options if opt != "All"]
+    return rng.choice(choices) if choices else "All"
+
+
+def interaction_steps(rng):
+    """The scripted user journey: a list of ``(name, action)`` pairs.
+
+    Each action takes an ``AppTest`` and returns it with widget values set;
+    the runner then triggers the rerun and times it. Tab switches are
+    client-side in Streamlit, so "switching tabs" is modelled as using the
+    widgets that live inside each tab.
+    """
+    def search(at):
+        term = rng.choice(["derrick", "anadarko", "brandt", "h&p", "permian"])
+        at.text_input[0].input(term)
+        return at
+
+    def clear_search(at):
+        at.text_input[0].input("")
+        return at
+
+    def cascade(label):
+        def step(at):
+            box = _widget(at.selectbox, label)
+            if box is not None:
+                box.select(_pick(box, rng))
+            return at
+        return step
+
+    def slider(label):
+        def step(at):
+            widget = _widget(at.slider, label)
+            if widget is not None:
+                lo, hi = widget.min, widget.max
+                span = hi - lo
+                widget.set_range(type(lo)(lo + span * 0.1), type(hi)(hi - span * 0.1))
+            return at
+        return step
+
+    def tab_metric(at):
+        box = _widget(at.selectbox, "Choose a metric to visualize")
+        if box is not None:
+            box.select(rng.choice(box.options))
+        return at
+
+    def tab_compare(at):
+        box = _widget(at.multiselect, "📌 Select Metrics to Compare")
+        if box is not None:
+            box.set_value(list(rng.choice(box.options, size=3, replace=False)))
+        return at
+
+    return [
+        ("search", search),
+        ("clear_search", clear_search),
+        ("operator", cascade("Operator")),
+        ("contractor", cascade("Contractor")),
+        ("shaker", cascade("Shaker")),
+        ("hole_size", cascade("Hole Size")),
+        ("interval_slider", slider("Interval Length")),
+        ("amw_slider", slider("Average Mud Weight (AMW)")),
+        ("tab_well_overview", tab_metric),
+        ("tab_comparison", tab_compare),
+    ]
+
+
+def run_session(script, session_id, timeout, results, errors):
+    rng = np.random.default_rng(session_id)
+    try:
+        at = AppTest.from_file(script, default_timeout=timeout)
+        start = time.perf_counter()
+        at.run()
+        results.append(("initial", time.perf_counter() - start))
+        for name, action in interaction_steps(rng):
+            action(at)
+            start = time.perf_counter()
+            at.run()
+            results.append((name, time.perf_counter() - start))
+            if at.exception:
+                errors.append((session_id, name, at.exception[0].message))
+    except Exception as e:
+        errors.append((session_id, "session", repr(e)))
+
+
+def peak_rss_mb():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux.
+    return usage / 1024 ** 2 if sys.platform == "darwin" else usage / 1024
+
+
+def summarize(results):
+    frame = pd.DataFrame(results, columns=["step", "seconds"])
+    by_step = frame.groupby("step", sort=False)["seconds"].describe(percentiles=[0.5, 0.95, 0.99])
+    overall = np.percentile(frame["seconds"], [50, 95, 99])
+    return by_step[["count", "50%", "95%", "99%", "max"]], overall
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--script", default="mapp.py", help="dashboard script to drive")
+    parser.add_argument("--sessions", type=int, default=4, help="concurrent simulated sessions")
+    parser.add_argument("--rows", type=int, default=0, help="synthetic dataset size (0 = use RIG_DATA / the shipped CSV)")
+    parser.add_argument("--backend", default=None, help="RIG_BACKEND for the run (pandas, sqlite, duckdb)")
+    parser.add_argument("--timeout", type=float, default=600, help="per-rerun timeout in seconds")
+    args = parser.parse_args(argv)
+
+    script = os.path.join(HERE, args.script)
+    if args.backend:
+        os.environ["RIG_BACKEND"] = args.backend
+    tmpdir = tempfile.TemporaryDirectory()
+    if args.rows:
+        path = os.path.join(tmpdir.name, f"synthetic_{args.rows}.csv")
+        model = synthdata.fit(pd.read_csv(os.path.join(HERE, DEFAULT_DATA_PATH)))
+        synthdata.generate(model, args.rows, path)
+        os.environ["RIG_DATA"] = path
+    # Scripts resolve the data path relative to the working directory.
+    os.chdir(HERE)
+
+    results, errors = [], []
+    threads = [threading.Thread(target=run_session, args=(script, i, args.timeout, results, errors))
+               for i in range(args.sessions)]
+    wall = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - wall
+
+    by_step, (p50, p95, p99) = summarize(results)
+    print(f"script={args.script} sessions={args.sessions} rows={args.rows or 'default'} "
+          f"backend={os.environ.get('RIG_BACKEND', 'pandas')}")
+    print(by_step.round(3).to_string())
+    print(f"\nreruns={len(results)} wall={wall:.1f}s p50={p50:.3f}s p95={p95:.3f}s p99={p99:.3f}s "
+          f"peak_rss={peak_rss_mb():.0f}MB")
+    for session_id, step, message in errors:
+        print(f"ERROR session={session_id} step={step}: {message}", file=sys.stderr)
+    tmpdir.cleanup()
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,82 +1,199 @@
 
-import pandas as pd
 import streamlit as st
-import plotly.express as px
+
+import startup
+from startup import (
+    ANOMALY_MODEL as anomaly_model, BACKEND_KIND as backend_kind, DATA_PATH as default_path, ROW_LIMIT,
+    cached_driver_regression, open_data, view_results,
+)
 
 st.set_page_config(page_title="Rig Comparison Dashboard", layout="wide")
 st.title("🚀 Rig Comparison Dashboard")
+# The page shell is on screen before the heavy imports below; when the warm-up
+# thread (started here if startup.py didn't launch the server) got there first
+# they are already loaded.
+startup.warm_in_background()
+
+import io
+import os
+from dataclasses import replace
+from functools import partial
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+import charts
+from analytics import (
+    ANOMALY_THRESHOLD, BENCHMARK_METRICS, COMPARE_COLUMNS, DRIVER_TARGETS, derrick_comparison_totals,
+    driver_table, efficiency_ranking, pairwise_comparison_from_moments, shaker_family, shaker_type,
+)
+from backends import MONTHS, FilterState
+from kpis import BUILTIN_KPIS, FUNCTIONS, KPIS_PATH, KPIError, delete_kpi, load_kpis, save_kpi
+from regimes import REGIME_FEATURES
+from scenarios import SCENARIO_COLUMNS, simulate, well_projection, with_costs
+from views import VIEWS_PATH, delete_view, load_views, save_view, view_state
 
 # ---------- LOAD DATA ----------
-default_path = "Updated_Merged_Data_with_API_and_Location.csv"
-data = pd.read_csv(default_path)
+@st.cache_data(max_entries=32)
+def cached_scenarios(version, view_key, uplifts, discard_scales, derrick_swap, _state, _backend):
+    # Volumes only: costs are a linear re-pricing (with_costs), so editing them never re-simulates.
+    rows = _backend.rows(_state, columns=["Well_Name", "flowline_Shakers"] + SCENARIO_COLUMNS)
+    applies = (shaker_type(rows["flowline_Shakers"]) == "Non-Derrick").to_numpy() if derrick_swap else None
+    return rows, applies, simulate(rows, uplifts, discard_scales, applies=applies)
+
+
+@st.cache_data(max_entries=32)
+def cached_pairwise(version, view_key, by, metrics, _state, _backend):
+    # Per-group counts, sums and squares come out of the backend, never the rows.
+    center = _backend.aggregate(_state, list(metrics), "mean").iloc[0].to_dict()
+    moments = {metric: _backend.cross_products(_state, [metric], by, center=center) for metric in center}
+    return pairwise_comparison_from_moments(moments, by=by, center=center)
+
+
+# Summaries below aggregate in the backend, so on the SQL backends they cover every
+# matching row, not just the ROW_LIMIT rows pulled in for row-level charts.
+@st.cache_data(max_entries=32)
+def cached_insights(version, view_key, _state, _backend):
+    means = _backend.aggregate(_state, ["DSRE", "Total_SCE", "Total_Dil", "Average_LGS%", "Dilution_Ratio",
+                                        "Discard Ratio"]).iloc[0]
+    maxes = _backend.aggregate(_state, ["Haul_OFF", "Depth"], how="max").iloc[0]
+    high = _backend.count(_state, where=("DSRE", ">", 0.9))
+    low = _backend.count(_state, where=("DSRE", "<", 0.6))
+    return means, maxes, high, low
+
+
+@st.cache_data(max_entries=32)
+def cached_derrick(version, view_key, metrics, _state, _backend):
+    sums = _backend.aggregate(_state, list(metrics), how="sum", by="flowline_Shakers")
+    counts = _backend.aggregate(_state, list(metrics), how="count", by="flowline_Shakers")
+    return derrick_comparison_totals(sums, counts, list(metrics))
+
+
+@st.cache_data(max_entries=32)
+def cached_regime_counts(version, view_key, regimes, _state, _backend):
+    return pd.Series({regime: _backend.count(replace(_state, regime=regime)) for regime in regimes
+                      if _state.regime in (None, regime)}, dtype=int, name="Intervals (selection)")
+
+
+@st.cache_data(max_entries=4)
+def cached_snapshot_diff(version, name, payload, _backend):
+    from snapshots import diff
+
+    reader = pd.read_parquet if name.endswith(".parquet") else pd.read_csv
+    return diff(reader(io.BytesIO(payload)), _backend.rows(FilterState()))
+
+
+@st.cache_resource
+def start_api(port, kind, path, anomaly_model=None):
+    from api import DashboardAPI, serve_in_background
+
+    # Served from the dashboard's own cached backend rather than a second copy of the data.
+    provider = partial(open_data, kind, path, anomaly_model)
+    return serve_in_background(port, DashboardAPI(path, kind, anomaly_model, provider=provider))
+
+
+version, backend = open_data(backend_kind, default_path, anomaly_model)
+if os.environ.get("RIG_API_PORT"):
+    # JSON API for other tools, started once per server process.
+    start_api(int(os.environ["RIG_API_PORT"]), backend_kind, default_path, anomaly_model)
+columns = backend.columns()
+# KPI columns (kpis.py) are offered next to the stored metrics in every picker and ranking.
+kpi_definitions = load_kpis(KPIS_PATH)
+kpi_names = [name for name in kpi_definitions if name in columns]
+
+# ---------- FILTER STATE & SAVED VIEWS ----------
+# Filter widgets are keyed so a view (from the URL or a saved view) can be loaded
+# into them; the resulting FilterState is written back to the URL every rerun.
+CASCADE_KEYS = [("operator", "f_operator"), ("contractor", "f_contractor"),
+                ("shaker", "f_shaker"), ("hole_size", "f_hole"), ("regime", "f_regime")]
+RANGE_KEYS = [("int_range", "f_int"), ("amw_range", "f_amw"), ("lgs_range", "f_lgs")]
+
+
+def restore_filters(state):
+    """Load ``state`` into the filter widgets' session state."""
+    for key in [key for key in st.session_state if key.startswith("f_")]:
+        del st.session_state[key]
+    st.session_state.f_search = state.search
+    for field, key in CASCADE_KEYS:
+        st.session_state[key] = "All" if getattr(state, field) is None else getattr(state, field)
+    for field, key in RANGE_KEYS:
+        if getattr(state, field) is not None:
+            st.session_state[key] = getattr(state, field)
+    st.session_state.f_year = "All" if state.td_year is None else state.td_year
+    st.session_state.f_month = "All" if state.td_month is None else state.td_month
+    if state.max_anomaly is not None:
+        st.session_state.f_exclude = True
+        st.session_state.f_cutoff = state.max_anomaly
+
+
+def reset_filters():
+    restore_filters(FilterState())
+    st.query_params.clear()
+
+
+def open_view(name):
+    state = view_state(name, VIEWS_PATH)
+    restore_filters(state)
+    st.query_params.from_dict(state.to_params())
+
+
+def choice(key, options):
+    """Fall back to "All" when a restored value isn't among this rerun's options."""
+    if st.session_state.get(key, "All") not in options:
+        st.session_state[key] = "All"
+    return options
+
+
+def seed_range(key, low, high, cast):
+    """Default a range slider to its full span, clamping any restored value to it."""
+    if key in st.session_state:
+        lo, hi = st.session_state[key]
+        st.session_state[key] = (cast(min(max(lo, low), high)), cast(min(max(hi, low), high)))
+    else:
+        st.session_state[key] = (low, high)
 
-if "Efficiency Score" in data.columns and data["Efficiency Score"].isnull().all():
-    data.drop(columns=["Efficiency Score"], inplace=True)
+
+if "f_loaded" not in st.session_state:
+    try:
+        restore_filters(FilterState.from_params(st.query_params.to_dict()))
+    except (TypeError, ValueError) as e:
+        st.warning(f"⚠️ Ignoring invalid filter link: {e}")
+        restore_filters(FilterState())
+    st.session_state.f_loaded = True
 
 # ---------- GLOBAL SEARCH & FILTER BAR ----------
 with st.container():
     col_search, col1, col2, col3, col4 = st.columns([2.5, 1.2, 1.2, 1.2, 1.2])
     with col_search:
         st.markdown("🔍 **Global Search**")
-        search_term = st.text_input("Search any column...")
-        reset_filters = st.button("🔄 Reset All Filters")
-        if reset_filters:
-            st.experimental_rerun()
-        if search_term:
-            search_term = search_term.lower()
-            data = data[data.apply(lambda row: row.astype(str).str.lower().str.contains(search_term).any(), axis=1)]
-            st.success(f"🔎 Found {len(data)} matching rows.")
+        search_term = st.text_input("Search any column...", key="f_search")
+        st.button("🔄 Reset All Filters", on_click=reset_filters)
+    state = FilterState(search=search_term.strip())
     with col1:
-        selected_operator = st.selectbox("Operator", ["All"] + sorted(data["Operator"].dropna().unique().tolist()))
+        selected_operator = st.selectbox("Operator", choice("f_operator", ["All"] + backend.options("Operator", state)),
+                                         key="f_operator")
+        state = replace(state, operator=None if selected_operator == "All" else selected_operator)
     with col2:
-        filtered_by_op = data if selected_operator == "All" else data[data["Operator"] == selected_operator]
-        selected_contractor = st.selectbox("Contractor", ["All"] + sorted(filtered_by_op["Contractor"].dropna().unique().tolist()))
+        selected_contractor = st.selectbox("Contractor", choice("f_contractor", ["All"] + backend.options("Contractor", state)),
+                                           key="f_contractor")
+        state = replace(state, contractor=None if selected_contractor == "All" else selected_contractor)
     with col3:
-        filtered_by_contractor = filtered_by_op if selected_contractor == "All" else filtered_by_op[filtered_by_op["Contractor"] == selected_contractor]
-        selected_shaker = st.selectbox("Shaker", ["All"] + sorted(filtered_by_contractor["flowline_Shakers"].dropna().unique().tolist()))
+        selected_shaker = st.selectbox("Shaker", choice("f_shaker", ["All"] + backend.options("flowline_Shakers", state)),
+                                       key="f_shaker")
+        state = replace(state, shaker=None if selected_shaker == "All" else selected_shaker)
     with col4:
-        filtered_by_shaker = filtered_by_contractor if selected_shaker == "All" else filtered_by_contractor[filtered_by_contractor["flowline_Shakers"] == selected_shaker]
-        selected_hole = st.selectbox("Hole Size", ["All"] + sorted(filtered_by_shaker["Hole_Size"].dropna().unique().tolist()))
-
-    filtered = filtered_by_shaker if selected_hole == "All" else filtered_by_shaker[filtered_by_shaker["Hole_Size"] == selected_hole]
-
-    reset_filters = st.button("🔄 Reset All Filters")
-    if reset_filters:
-        st.experimental_rerun()
+        selected_hole = st.selectbox("Hole Size", choice("f_hole", ["All"] + backend.options("Hole_Size", state)),
+                                     key="f_hole")
+        state = replace(state, hole_size=None if selected_hole == "All" else selected_hole)
 
     if search_term:
-        search_term = search_term.lower()
-        data = data[data.apply(lambda row: row.astype(str).str.lower().str.contains(search_term).any(), axis=1)]
-        st.success(f"🔎 Found {len(data)} matching rows.")
-    filtered = data
-
-# ---------- FILTER BAR ----------
-with st.container():
-    st.markdown("### 🎛️ Filter by Key Dimensions")
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        selected_operator = st.selectbox("Operator", ["All"] + sorted(data["Operator"].dropna().unique().tolist()))
-    with col2:
-        filtered_by_op = data if selected_operator == "All" else data[data["Operator"] == selected_operator]
-        selected_contractor = st.selectbox("Contractor", ["All"] + sorted(filtered_by_op["Contractor"].dropna().unique().tolist()))
-    with col3:
-        filtered_by_contractor = filtered_by_op if selected_contractor == "All" else filtered_by_op[filtered_by_op["Contractor"] == selected_contractor]
-        selected_shaker = st.selectbox("Shaker", ["All"] + sorted(filtered_by_contractor["flowline_Shakers"].dropna().unique().tolist()))
-    with col4:
-        filtered_by_shaker = filtered_by_contractor if selected_shaker == "All" else filtered_by_contractor[filtered_by_contractor["flowline_Shakers"] == selected_shaker]
-        selected_hole = st.selectbox("Hole Size", ["All"] + sorted(filtered_by_shaker["Hole_Size"].dropna().unique().tolist()))
-
-    filtered = filtered_by_shaker if selected_hole == "All" else filtered_by_shaker[filtered_by_shaker["Hole_Size"] == selected_hole]
+        st.success(f"🔎 Found {backend.count(FilterState(search=state.search)):,} matching rows.")
 
 # ---------- METRICS ----------
 st.markdown("### 📊 Key Metrics")
-m1, m2, m3 = st.columns(3)
-with m1:
-    st.metric("Avg Total Dilution", f"{filtered['Total_Dil'].mean():,.2f} BBLs")
-with m2:
-    st.metric("Avg SCE", f"{filtered['Total_SCE'].mean():,.2f}")
-with m3:
-    st.metric("Avg DSRE", f"{filtered['DSRE'].mean()*100:.1f}%")
+metrics_box = st.container()
 
 # ---------- MAIN TABS ----------
 tabs = st.tabs([
@@ -85,7 +202,8 @@ tabs = st.tabs([
     "📊 Statistical Insights", 
     "📈 Advanced Analytics", 
     "🧮 Multi-Well Comparison", 
-    "⚙️ Advanced Tab"
+    "⚙️ Advanced Tab",
+    "🔮 What-If Scenarios"
 ])
 
 # ---------- ADVANCED FILTERS TAB ----------
@@ -93,46 +211,178 @@ with tabs[5]:
     st.markdown("### ⚙️ Advanced Filters")
     st.info("Use sliders and dropdowns to drill down on performance.")
 
+    advanced = {}
     col1, col2 = st.columns(2)
     with col1:
-        if "IntLength" in data.columns:
-            min_val, max_val = int(data["IntLength"].min()), int(data["IntLength"].max())
-            int_range = st.slider("Interval Length", min_val, max_val, (min_val, max_val))
-            filtered = filtered[(filtered["IntLength"] >= int_range[0]) & (filtered["IntLength"] <= int_range[1])]
-        if "AMW" in data.columns:
-            min_amw, max_amw = float(data["AMW"].min()), float(data["AMW"].max())
-            amw_range = st.slider("Average Mud Weight (AMW)", min_amw, max_amw, (min_amw, max_amw))
-            filtered = filtered[(filtered["AMW"] >= amw_range[0]) & (filtered["AMW"] <= amw_range[1])]
+        if "IntLength" in columns:
+            min_val, max_val = (int(v) for v in backend.bounds("IntLength"))
+            seed_range("f_int", min_val, max_val, int)
+            int_range = st.slider("Interval Length", min_val, max_val, key="f_int")
+            if int_range != (min_val, max_val):
+                advanced["int_range"] = int_range
+        if "AMW" in columns:
+            min_amw, max_amw = (float(v) for v in backend.bounds("AMW"))
+            seed_range("f_amw", min_amw, max_amw, float)
+            amw_range = st.slider("Average Mud Weight (AMW)", min_amw, max_amw, key="f_amw")
+            if amw_range != (min_amw, max_amw):
+                advanced["amw_range"] = amw_range
 
     with col2:
-        if "Average_LGS%" in data.columns:
-            lgs_min, lgs_max = float(data["Average_LGS%"].min()), float(data["Average_LGS%"].max())
-            lgs_range = st.slider("Average LGS%", lgs_min, lgs_max, (lgs_min, lgs_max))
-            filtered = filtered[(filtered["Average_LGS%"] >= lgs_range[0]) & (filtered["Average_LGS%"] <= lgs_range[1])]
-
-        if "TD_Date" in data.columns and not data["TD_Date"].isnull().all():
-            try:
-                data["TD_Date"] = pd.to_datetime(data["TD_Date"], errors='coerce')
-                data["TD_Year"] = data["TD_Date"].dt.year
-                data["TD_Month"] = data["TD_Date"].dt.strftime('%B')
-
-                td_years = sorted(data["TD_Year"].dropna().unique())
-                td_months = ["January", "February", "March", "April", "May", "June",
-                             "July", "August", "September", "October", "November", "December"]
-
-                selected_year = st.selectbox("Select TD Year", options=["All"] + [int(y) for y in td_years])
-                selected_month = st.selectbox("Select TD Month", options=["All"] + td_months)
-
-                if selected_year != "All":
-                    filtered = filtered[filtered["TD_Year"] == selected_year]
-                if selected_month != "All":
-                    filtered = filtered[filtered["TD_Month"] == selected_month]
-            except Exception as e:
-                st.warning(f"⚠️ TD_Date processing failed: {e}")
+        if "Average_LGS%" in columns:
+            lgs_min, lgs_max = (float(v) for v in backend.bounds("Average_LGS%"))
+            seed_range("f_lgs", lgs_min, lgs_max, float)
+            lgs_range = st.slider("Average LGS%", lgs_min, lgs_max, key="f_lgs")
+            if lgs_range != (lgs_min, lgs_max):
+                advanced["lgs_range"] = lgs_range
+
+        if "TD_Year" in columns:
+            td_years = backend.options("TD_Year", FilterState())
+            selected_year = st.selectbox("Select TD Year", options=choice("f_year", ["All"] + [int(y) for y in td_years]),
+                                         key="f_year")
+            selected_month = st.selectbox("Select TD Month", options=choice("f_month", ["All"] + MONTHS), key="f_month")
+
+            if selected_year != "All":
+                advanced["td_year"] = selected_year
+            if selected_month != "All":
+                advanced["td_month"] = selected_month
+
+    if "Anomaly_Score" in columns:
+        st.markdown("#### 🚩 Outliers")
+        o1, o2 = st.columns(2)
+        with o1:
+            st.session_state.setdefault("f_cutoff", ANOMALY_THRESHOLD)
+            anomaly_cutoff = st.slider("Anomaly score cut-off", 2.0, 50.0, step=0.5, key="f_cutoff")
+        with o2:
+            st.write("")
+            if st.checkbox("Exclude rows above the cut-off", key="f_exclude"):
+                advanced["max_anomaly"] = anomaly_cutoff
+
+    if "Regime" in columns:
+        st.markdown("#### 🧭 Performance Regime")
+        selected_regime = st.selectbox("Regime", choice("f_regime", ["All"] + backend.options("Regime", state)),
+                                       key="f_regime",
+                                       help="Clusters of intervals with similar mud weight, solids, ROP, DSRE, "
+                                            "dilution and hole size (see Advanced Analytics).")
+        if selected_regime != "All":
+            advanced["regime"] = selected_regime
+
+    well_col = "Well_Name"
+    if "Canonical_Well" in columns:
+        st.markdown("#### 🧬 Well Identity")
+        if st.checkbox("Merge duplicate wells", value=True, key="merge_wells",
+                       help="Group charts by the resolved well (same well under different names or missing IDs)."):
+            well_col = "Canonical_Well"
+
+state = replace(state, **advanced)
+filtered, key_metrics = view_results(version, state.key(), ROW_LIMIT, state, backend)
+share_params = state.to_params()
+if st.query_params.to_dict() != share_params:
+    st.query_params.from_dict(share_params)
+
+with metrics_box:
+    m1, m2, m3 = st.columns(3)
+    with m1:
+        st.metric("Avg Total Dilution", f"{key_metrics['Total_Dil']:,.2f} BBLs")
+    with m2:
+        st.metric("Avg SCE", f"{key_metrics['Total_SCE']:,.2f}")
+    with m3:
+        st.metric("Avg DSRE", f"{key_metrics['DSRE']*100:.1f}%")
+    if ROW_LIMIT is not None and len(filtered) >= ROW_LIMIT:
+        total_rows = backend.count(state)
+        if total_rows > len(filtered):
+            st.warning(f"⚠️ Row-level charts, tables and rankings use the first {len(filtered):,} of "
+                       f"{total_rows:,} matching rows. Key Metrics, Statistical Insights, the Derrick vs "
+                       "Non-Derrick averages and regime counts cover every row.")
+
+# ---------- SAVED VIEWS ----------
+with st.sidebar:
+    st.markdown("### 💾 Saved Views")
+    saved_views = load_views(VIEWS_PATH)
+    if saved_views:
+        picked_view = st.selectbox("Open a saved view", sorted(saved_views))
+        v1, v2 = st.columns(2)
+        with v1:
+            st.button("📂 Open", on_click=open_view, args=(picked_view,), use_container_width=True)
+        with v2:
+            st.button("🗑️ Delete", on_click=delete_view, args=(picked_view, VIEWS_PATH), use_container_width=True)
+    new_view = st.text_input("Name this view")
+    if st.button("💾 Save current filters", disabled=not new_view.strip()):
+        save_view(new_view.strip(), state, VIEWS_PATH)
+        st.success(f"Saved view '{new_view.strip()}'.")
+    st.markdown("🔗 **Share link**")
+    st.caption("Append to the dashboard URL; the address bar already carries it.")
+    st.code("?" + urlencode(share_params) if share_params else "(no filters)", language=None)
+    st.caption(f"View key `{state.key()}` · data version `{version}`")
+    if startup.TIMINGS:
+        with st.expander("⏱️ Startup timing", expanded=False):
+            st.dataframe(pd.DataFrame({"Step": list(startup.TIMINGS), "Seconds": list(startup.TIMINGS.values())})
+                         .round(2), hide_index=True, use_container_width=True)
 
+with tabs[5]:
     st.markdown("### 🔍 Filtered Results Preview")
+    if ROW_LIMIT is not None and len(filtered) == ROW_LIMIT:
+        st.caption(f"Showing the first {ROW_LIMIT:,} of {backend.count(state):,} matching rows.")
     st.dataframe(filtered)
 
+    if "Anomaly_Score" in filtered.columns:
+        flagged = filtered[filtered["Anomaly_Score"] > anomaly_cutoff]
+        with st.expander(f"🚩 {len(flagged):,} flagged rows above a score of {anomaly_cutoff:g}", expanded=False):
+            st.caption("Score = largest robust z-score within the row's hole size; "
+                       "inf marks physically impossible values.")
+            flagged_cols = [col for col in ["Well_Name", "Operator", "Contractor", "Anomaly_Score", "Anomaly_Reason"]
+                            if col in flagged.columns]
+            st.dataframe(flagged.sort_values("Anomaly_Score", ascending=False)[flagged_cols], use_container_width=True)
+
+    st.markdown("### 🗂️ Compare Dataset Versions")
+    st.caption("Upload an earlier snapshot of the data file to see what the current version added, removed "
+               "and revised, and how each moved the headline averages.")
+    snapshot = st.file_uploader("Previous snapshot", type=["csv", "parquet"], key="snapshot_file")
+    if snapshot is not None:
+        result = cached_snapshot_diff(version, snapshot.name, snapshot.getvalue(), backend)
+        counts = result.counts()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Rows Added", f"{counts['added']:,}")
+        col2.metric("Rows Removed", f"{counts['removed']:,}")
+        col3.metric("Rows Revised", f"{counts['changed']:,}")
+        st.markdown("**Impact on averages** (previous → current, split by cause)")
+        st.dataframe(result.impact.round(4), use_container_width=True, hide_index=True)
+        if len(result.changed):
+            with st.expander(f"✏️ {len(result.changed):,} revised values", expanded=False):
+                st.dataframe(result.changed.astype({"old": str, "new": str}), use_container_width=True)
+        for label, rows in [("➕ Added rows", result.added), ("➖ Removed rows", result.removed)]:
+            if len(rows):
+                with st.expander(f"{label} ({len(rows):,})", expanded=False):
+                    st.dataframe(rows, use_container_width=True)
+
+    st.markdown("### 🧮 KPI Definitions")
+    st.caption("Named formulas over the data's columns, computed once per data version and offered in every "
+               "metric picker and ranking. Use numbers, columns, + - * / ** and "
+               + ", ".join(f"{name}()" for name in FUNCTIONS)
+               + "; put names with spaces in backticks, e.g. DSRE * 100 - `Discard Ratio` * 10.")
+    for name, error in backend.kpi_errors.items():
+        st.warning(f"⚠️ KPI '{name}' is not computed: {error}")
+    st.dataframe(pd.DataFrame({"KPI": list(kpi_definitions), "Expression": list(kpi_definitions.values()),
+                               "Built-in": [name in BUILTIN_KPIS for name in kpi_definitions]}),
+                 hide_index=True, use_container_width=True)
+    e1, e2 = st.columns([1, 2])
+    with e1:
+        kpi_name = st.text_input("KPI name", placeholder="Haul-Off per ft")
+    with e2:
+        kpi_expression = st.text_input("Expression", placeholder="Haul_OFF / IntLength")
+    e3, e4 = st.columns(2)
+    with e3:
+        if st.button("💾 Save KPI", disabled=not (kpi_name.strip() and kpi_expression.strip())):
+            try:
+                save_kpi(kpi_name, kpi_expression, [col for col in columns if col not in kpi_names], KPIS_PATH)
+                st.rerun()
+            except KPIError as e:
+                st.error(f"❌ {e}")
+    with e4:
+        kpi_to_delete = st.selectbox("Remove a KPI (built-ins reset to their default)", [""] + list(kpi_definitions))
+        if st.button("🗑️ Remove KPI", disabled=not kpi_to_delete):
+            delete_kpi(kpi_to_delete, KPIS_PATH)
+            st.rerun()
+
 # ---------- FOOTER ----------
 st.markdown("""
 <div style='position: fixed; left: 0; bottom: 0; width: 100%; background-color: #1c1c1c; color: white; text-align: center; padding: 8px 0; font-size: 0.9rem; z-index: 999;'>
@@ -146,23 +396,23 @@ with tabs[0]:
     st.markdown("Analyze well-level performance metrics as grouped column bar charts.")
 
     available_metrics = ["DSRE", "Total_SCE", "Total_Dil", "ROP", "Temp", "DOW", "AMW", 
-                         "Drilling_Hours", "Haul_OFF", "Base_Oil", "Water", "Weight_Material"]
+                         "Drilling_Hours", "Haul_OFF", "Base_Oil", "Water", "Weight_Material"] + kpi_names
 
     selected_metric = st.selectbox("Choose a metric to visualize", available_metrics)
 
-    if "Metric" in data.columns and "Value" in data.columns:
-        metric_data = data[data["Metric"] == selected_metric]
+    if "Metric" in filtered.columns and "Value" in filtered.columns:
+        metric_data = filtered[filtered["Metric"] == selected_metric]
     else:
         metric_data = pd.melt(
-            data,
-            id_vars=["Well_Name"],
-            value_vars=[col for col in available_metrics if col in data.columns],
+            filtered,
+            id_vars=[well_col],
+            value_vars=[col for col in available_metrics if col in filtered.columns],
             var_name="Metric",
             value_name="Value"
         )
         metric_data = metric_data[metric_data["Metric"] == selected_metric]
 
-    fig = px.bar(metric_data, x="Well_Name", y="Value", title=f"Well Name vs {selected_metric}")
+    fig = px.bar(metric_data, x=well_col, y="Value", title=f"Well Name vs {selected_metric}")
     st.plotly_chart(fig, use_container_width=True)
 
     st.markdown("### 🧾 Well-Level Overview")
@@ -173,10 +423,10 @@ with tabs[0]:
     ]
 
     available_cols = [col for col in numeric_cols if col in filtered.columns]
-    melted_df = filtered[["Well_Name"] + available_cols].melt(id_vars="Well_Name", var_name="Metric", value_name="Value")
+    melted_df = filtered[[well_col] + available_cols].melt(id_vars=well_col, var_name="Metric", value_name="Value")
 
     if not melted_df.empty:
-        fig2 = px.bar(melted_df, x="Well_Name", y="Value", color="Metric", barmode="group",
+        fig2 = px.bar(melted_df, x=well_col, y="Value", color="Metric", barmode="group",
                       title="Well Name vs Key Metrics", height=600)
         st.plotly_chart(fig2, use_container_width=True)
     else:
@@ -191,10 +441,10 @@ with tabs[1]:
 
     with chart1:
         st.markdown("#### 📌 Depth vs DOW")
-        subset = filtered.dropna(subset=["Well_Name"])
+        subset = filtered.dropna(subset=[well_col])
         y_cols = [col for col in ["Depth", "DOW"] if col in subset.columns]
         if y_cols:
-            fig1 = px.bar(subset, x="Well_Name", y=y_cols, barmode='group', height=400,
+            fig1 = px.bar(subset, x=well_col, y=y_cols, barmode='group', height=400,
                          labels={"value": "Barrels", "variable": "Metric"},
                          color_discrete_sequence=px.colors.qualitative.Prism)
             st.plotly_chart(fig1, use_container_width=True)
@@ -205,7 +455,7 @@ with tabs[1]:
         st.markdown("#### 🌈 Dilution Breakdown")
         y_cols = [col for col in ["Base_Oil", "Water", "Weight_Material", "Chemicals"] if col in subset.columns]
         if y_cols:
-            fig2 = px.bar(subset, x="Well_Name", y=y_cols, barmode="stack", height=400,
+            fig2 = px.bar(subset, x=well_col, y=y_cols, barmode="stack", height=400,
                          color_discrete_sequence=px.colors.qualitative.Set2)
             st.plotly_chart(fig2, use_container_width=True)
         else:
@@ -214,11 +464,11 @@ with tabs[1]:
     st.markdown("### 📈 DSRE vs Ratios")
     if "DSRE" in subset.columns:
         try:
-            fig3 = px.bar(subset, x="Well_Name", y="DSRE", height=400,
+            fig3 = px.bar(subset, x=well_col, y="DSRE", height=400,
                          labels={"DSRE": "DSRE"}, color_discrete_sequence=["#66c2a5"])
             if "Discard Ratio" in subset.columns:
                 fig3.add_scatter(
-                    x=subset["Well_Name"],
+                    x=subset[well_col],
                     y=subset["Discard Ratio"],
                     mode="lines+markers",
                     name="SCE Loss Ratio",
@@ -226,7 +476,7 @@ with tabs[1]:
                 )
             if "Dilution_Ratio" in subset.columns:
                 fig3.add_scatter(
-                    x=subset["Well_Name"],
+                    x=subset[well_col],
                     y=subset["Dilution_Ratio"],
                     mode="lines+markers",
                     name="Dilution Ratio",
@@ -242,7 +492,7 @@ with tabs[1]:
     ratio_cols = [col for col in ["Dilution_Ratio", "Discard Ratio"] if col in subset.columns]
     if ratio_cols:
         try:
-            fig4 = px.line(subset, x="Well_Name", y=ratio_cols, markers=True,
+            fig4 = px.line(subset, x=well_col, y=ratio_cols, markers=True,
                           labels={"value": "Ratio", "variable": "Metric"},
                           title="Dilution vs SCE Loss Ratios")
             st.plotly_chart(fig4, use_container_width=True)
@@ -257,36 +507,42 @@ with tabs[1]:
 with tabs[2]:
     st.markdown("### 📊 Statistical Summary & Insights")
 
+    insight_means, insight_maxes, high_eff, low_eff = cached_insights(version, state.key(), state, backend)
+
+    def insight(series, column):
+        value = series.get(column)
+        return value if pd.notnull(value) else None
+
     k1, k2, k3, k4 = st.columns(4)
     with k1:
-        st.metric("📈 Mean DSRE", f"{filtered['DSRE'].mean()*100:.2f}%")
+        st.metric("📈 Mean DSRE", f"{insight_means['DSRE']*100:.2f}%")
     with k2:
-        st.metric("🚛 Max Haul Off", f"{filtered['Haul_OFF'].max():,.0f}")
+        st.metric("🚛 Max Haul Off", f"{insight_maxes['Haul_OFF']:,.0f}")
     with k3:
-        st.metric("🧪 Avg SCE", f"{filtered['Total_SCE'].mean():,.2f}")
+        st.metric("🧪 Avg SCE", f"{insight_means['Total_SCE']:,.2f}")
     with k4:
-        st.metric("💧 Avg Dilution", f"{filtered['Total_Dil'].mean():,.2f}")
+        st.metric("💧 Avg Dilution", f"{insight_means['Total_Dil']:,.2f}")
 
     k5, k6, k7, k8 = st.columns(4)
     with k5:
-        max_depth = filtered['Depth'].max() if "Depth" in filtered.columns else None
-        st.metric("⛏️ Max Depth", f"{max_depth:,.0f}" if pd.notnull(max_depth) else "N/A")
+        max_depth = insight(insight_maxes, "Depth")
+        st.metric("⛏️ Max Depth", f"{max_depth:,.0f}" if max_depth is not None else "N/A")
 
     with k6:
-        avg_lgs = filtered["Average_LGS%"].mean() if "Average_LGS%" in filtered.columns else None
-        st.metric("🌀 Avg LGS%", f"{avg_lgs:.2f}" if pd.notnull(avg_lgs) else "N/A")
+        avg_lgs = insight(insight_means, "Average_LGS%")
+        st.metric("🌀 Avg LGS%", f"{avg_lgs:.2f}" if avg_lgs is not None else "N/A")
 
     with k7:
-        if "Dilution_Ratio" in filtered.columns:
-            avg_dil = filtered["Dilution_Ratio"].mean()
+        avg_dil = insight(insight_means, "Dilution_Ratio")
+        if avg_dil is not None:
             dil_icon = "🟢" if avg_dil < 1 else "🟡" if avg_dil < 2 else "🔴"
             st.metric("🥄 Dilution Ratio", f"{avg_dil:.2f} {dil_icon}")
         else:
             st.metric("🥄 Dilution Ratio", "N/A")
 
     with k8:
-        if "Discard Ratio" in filtered.columns:
-            avg_disc = filtered["Discard Ratio"].mean()
+        avg_disc = insight(insight_means, "Discard Ratio")
+        if avg_disc is not None:
             disc_icon = "🟢" if avg_disc < 0.1 else "🟡" if avg_disc < 0.2 else "🔴"
             st.metric("🗑️ Discard Ratio", f"{avg_disc:.2f} {disc_icon}")
         else:
@@ -295,11 +551,9 @@ with tabs[2]:
     # --- Insights Summary ---
     st.markdown("#### 🔍 Automatic Insights")
 
-    if 'DSRE' in filtered.columns:
-        high_eff = filtered[filtered['DSRE'] > 0.9]
-        low_eff = filtered[filtered['DSRE'] < 0.6]
-        st.success(f"✅ **High Efficiency Wells (DSRE > 90%)**: {len(high_eff)}")
-        st.warning(f"⚠️ **Low Efficiency Wells (DSRE < 60%)**: {len(low_eff)}")
+    if "DSRE" in columns:
+        st.success(f"✅ **High Efficiency Wells (DSRE > 90%)**: {high_eff}")
+        st.warning(f"⚠️ **Low Efficiency Wells (DSRE < 60%)**: {low_eff}")
     else:
         st.info("DSRE column not found for efficiency insights.")
 
@@ -319,15 +573,35 @@ This section helps the **drilling engineer** understand how mud composition, tem
 """)
     st.markdown("### 🤖 Advanced Analytics & Trends")
 
+    # Colours are bucketed (not one trace per well) and large selections are decimated server-side.
+    scatter_data = filtered.assign(Shaker_Family=shaker_family(filtered["flowline_Shakers"]))
+    s1, s2 = st.columns(2)
+    with s1:
+        scatter_color = st.radio("Color points by",
+                                 ["Operator", "Shaker_Family"] + (["Regime"] if "Regime" in columns else []),
+                                 horizontal=True,
+                                 format_func=lambda col: col.replace("_", " "))
+    with s2:
+        scatter_mode = "Points"
+        if len(scatter_data) > charts.MAX_POINTS:
+            scatter_mode = st.radio("Large selection", ["Points", "Density"], horizontal=True,
+                                    help=f"Points keeps about {charts.MAX_POINTS:,} rows sampled evenly across "
+                                         "the chart; Density bins every row.")
+
+    def scatter_chart(x, y, size=None, **kwargs):
+        if scatter_mode == "Density":
+            fig = charts.density_heatmap(scatter_data, x, y, **kwargs)
+        else:
+            fig, shown = charts.scatter(scatter_data, x, y, scatter_color, size=size, **kwargs)
+            if shown < len(scatter_data):
+                st.caption(f"Showing {shown:,} of {len(scatter_data):,} rows, sampled to keep each region's density.")
+        st.plotly_chart(fig, use_container_width=True)
+
     st.markdown("#### 📌 ROP vs Temperature")
     if "ROP" in filtered.columns and "Temp" in filtered.columns:
         try:
-            fig_rop_temp = px.scatter(
-                filtered, x="ROP", y="Temp", color="Well_Name",
-                title="ROP vs Temperature",
-                labels={"ROP": "Rate of Penetration", "Temp": "Temperature (°F)"}
-            )
-            st.plotly_chart(fig_rop_temp, use_container_width=True)
+            scatter_chart("ROP", "Temp", title="ROP vs Temperature",
+                          labels={"ROP": "Rate of Penetration", "Temp": "Temperature (°F)"})
         except Exception as e:
             st.error(f"Error rendering ROP vs Temp chart: {e}")
     else:
@@ -336,12 +610,8 @@ This section helps the **drilling engineer** understand how mud composition, tem
     st.markdown("#### 📌 Base Oil vs Water Composition")
     if "Base_Oil" in filtered.columns and "Water" in filtered.columns:
         try:
-            fig_bo_water = px.scatter(
-                filtered, x="Base_Oil", y="Water", size="Total_Dil",
-                color="Well_Name", title="Base Oil vs Water Breakdown",
-                labels={"Base_Oil": "Base Oil (bbl)", "Water": "Water (bbl)"}
-            )
-            st.plotly_chart(fig_bo_water, use_container_width=True)
+            scatter_chart("Base_Oil", "Water", size="Total_Dil", title="Base Oil vs Water Breakdown",
+                          labels={"Base_Oil": "Base Oil (bbl)", "Water": "Water (bbl)"})
         except Exception as e:
             st.error(f"Error rendering Base Oil vs Water chart: {e}")
     else:
@@ -349,13 +619,49 @@ This section helps the **drilling engineer** understand how mud composition, tem
 
     st.markdown("#### 📌 Correlation Heatmap")
     try:
-        corr_cols = ["DSRE", "Total_SCE", "Total_Dil", "Discard Ratio", "Dilution_Ratio", "ROP", "AMW", "Haul_OFF"]
+        corr_cols = ["DSRE", "Total_SCE", "Total_Dil", "Discard Ratio", "Dilution_Ratio", "ROP", "AMW", "Haul_OFF"] + kpi_names
         corr_data = filtered[corr_cols].dropna()
         fig_corr = px.imshow(corr_data.corr(), text_auto=True, aspect="auto", color_continuous_scale='Blues')
         st.plotly_chart(fig_corr, use_container_width=True)
     except Exception as e:
         st.error(f"Correlation heatmap error: {e}")
 
+    st.markdown("#### 📌 DSRE & Dilution Drivers")
+    st.caption("Least-squares fit per group on standardised drivers: each value is the change in the target "
+               "for a one standard deviation move in that driver. Computed over the full dataset.")
+    d1, d2, d3 = st.columns(3)
+    with d1:
+        driver_target = st.selectbox("Target", DRIVER_TARGETS + kpi_names)
+    with d2:
+        driver_by = st.selectbox("Group by", ["Contractor", "flowline_Shakers"],
+                                 format_func=lambda col: "Shaker" if col == "flowline_Shakers" else col)
+    with d3:
+        driver_value = st.selectbox("Show", ["coef", "se", "t"],
+                                    format_func={"coef": "Coefficient", "se": "Std. Error", "t": "t-stat"}.get)
+    try:
+        driver_results = cached_driver_regression(version, driver_target, driver_by, backend)
+        st.dataframe(driver_table(driver_results, driver_by, driver_value).round(4), use_container_width=True)
+    except Exception as e:
+        st.error(f"Driver regression error: {e}")
+
+    if "Regime" in columns:
+        st.markdown("#### 🧭 Performance Regimes")
+        st.caption("Mini-batch k-means over standardised " + ", ".join(REGIME_FEATURES) + ", fitted once per "
+                   "data version. Regimes are named after the features that set them apart; filter by one in "
+                   "the Advanced tab or colour the scatters above by it.")
+        try:
+            profile = backend.aggregate(FilterState(), REGIME_FEATURES, by="Regime").set_index("Regime")
+            selection = cached_regime_counts(version, state.key(), tuple(profile.index), state, backend)
+            selection = selection.rename_axis("Regime")
+            st.dataframe(profile.join(selection).fillna({"Intervals (selection)": 0}).round(3),
+                         use_container_width=True)
+            fig_regimes = px.bar(selection.reset_index(), x="Regime", y="Intervals (selection)", color="Regime",
+                                 category_orders={"Regime": list(profile.index)},
+                                 title="Intervals per Regime in the Current Selection")
+            st.plotly_chart(fig_regimes, use_container_width=True)
+        except Exception as e:
+            st.error(f"Regime summary error: {e}")
+
 
 # ---------- TAB 5: DERRICK vs NON-DERRICK ----------
 with tabs[4]:
@@ -376,30 +682,11 @@ This section compares **shaker performance** across rig setups:
     st.markdown("### 🧮 Derrick vs Non-Derrick Comparison")
     st.markdown("Compare key performance metrics by shaker type. Derrick = 🟩, Non-Derrick = 🟥")
 
-    compare_cols = [
-        "DSRE", "Discard Ratio", "Total_SCE", "Total_Dil", "ROP", "Temp", "DOW", "AMW",
-        "Drilling_Hours", "Haul_OFF", "Base_Oil", "Water", "Weight_Material",
-        "Chemicals", "Dilution_Ratio", "Solids_Generated"
-    ]
-
     if "flowline_Shakers" in filtered.columns:
-        filtered["Shaker_Type"] = filtered["flowline_Shakers"].apply(
-            lambda x: "Derrick" if isinstance(x, str) and "derrick" in x.lower() else "Non-Derrick"
-        )
-
-        selected_metrics = st.multiselect("📌 Select Metrics to Compare", compare_cols, default=["DSRE", "ROP", "Total_Dil"])
+        selected_metrics = st.multiselect("📌 Select Metrics to Compare", COMPARE_COLUMNS + kpi_names, default=["DSRE", "ROP", "Total_Dil"])
 
         if selected_metrics:
-            derrick_group = filtered[filtered["Shaker_Type"] == "Derrick"]
-            non_derrick_group = filtered[filtered["Shaker_Type"] == "Non-Derrick"]
-
-            derrick_avg = derrick_group[selected_metrics].mean().reset_index()
-            derrick_avg.columns = ["Metric", "Derrick"]
-
-            non_derrick_avg = non_derrick_group[selected_metrics].mean().reset_index()
-            non_derrick_avg.columns = ["Metric", "Non-Derrick"]
-
-            merged_avg = pd.merge(derrick_avg, non_derrick_avg, on="Metric")
+            merged_avg = cached_derrick(version, state.key(), tuple(selected_metrics), state, backend)
             melted_avg = pd.melt(merged_avg, id_vars="Metric", value_vars=["Derrick", "Non-Derrick"], 
                                  var_name="Shaker_Type", value_name="Average")
 
@@ -410,24 +697,122 @@ This section compares **shaker performance** across rig setups:
             )
             st.plotly_chart(fig, use_container_width=True)
 
-            scoring_df = filtered.copy()
-            if "DSRE" in scoring_df.columns:
-                scoring_df["Efficiency Score"] = (
-                    scoring_df["DSRE"].fillna(0) * 100
-                    - scoring_df.get("Dilution_Ratio", 0).fillna(0) * 10
-                    - scoring_df.get("Discard Ratio", 0).fillna(0) * 10
-                )
-                scoring_df["Flag"] = scoring_df["Shaker_Type"].map({
+            if kpi_names:
+                rank_kpi = st.selectbox("🏅 Rank wells by", kpi_names)
+                rank_df = efficiency_ranking(filtered.assign(Well_Name=filtered[well_col]), rank_kpi)
+                rank_df["Flag"] = rank_df["Shaker_Type"].map({
                     "Derrick": "🟩 Derrick",
                     "Non-Derrick": "🟥 Non-Derrick"
                 })
-                rank_df = scoring_df[["Well_Name", "Shaker_Type", "Efficiency Score", "Flag"]]\
-                    .sort_values(by="Efficiency Score", ascending=False).reset_index(drop=True)
-                st.markdown("### 🏅 Ranked Wells by Efficiency Score")
+                st.markdown(f"### 🏅 Ranked Wells by {rank_kpi}")
                 st.dataframe(rank_df.drop(columns=["Shaker_Type"]), use_container_width=True)
             else:
-                st.warning("⚠️ DSRE column missing for scoring.")
+                st.warning("⚠️ No KPI could be computed for scoring; see KPI Definitions in the Advanced tab.")
         else:
             st.info("ℹ️ Please select at least one metric to compare.")
     else:
         st.warning("⚠️ 'flowline_Shakers' column not found in dataset.")
+
+    st.markdown("### 🏗️ Contractor Benchmark Matrix")
+    st.caption("Each cell compares the row contractor with the column contractor: color is the effect size "
+               "(Cohen's d, row minus column, in pooled standard deviations); stars mark Welch t-test "
+               "significance after Benjamini-Hochberg adjustment (* q<0.05, ** q<0.01, *** q<0.001).")
+    b1, b2 = st.columns(2)
+    with b1:
+        bench_metrics = [m for m in BENCHMARK_METRICS if m in columns] + kpi_names
+        bench_metric = st.selectbox("Benchmark metric", bench_metrics)
+    with b2:
+        bench_top = st.slider("Contractors (most intervals first)", 5, 40, 15)
+    try:
+        bench = cached_pairwise(version, state.key(), "Contractor", tuple(bench_metrics), state, backend)
+        bench = bench[(bench["Metric"] == bench_metric) & (bench["n"] >= 3) & (bench["n_other"] >= 3)]
+        top = bench.drop_duplicates("Contractor").nlargest(bench_top, "n")["Contractor"].tolist()
+        bench = bench[bench["Contractor"].isin(top) & bench["Other"].isin(top)]
+        if len(top) < 2:
+            st.info("ℹ️ Need at least two contractors with 3+ intervals in the current selection.")
+        else:
+            effect = bench.pivot(index="Contractor", columns="Other", values="d").reindex(index=top, columns=top)
+            q = bench.pivot(index="Contractor", columns="Other", values="q").reindex(index=top, columns=top)
+            stars = pd.DataFrame(np.select([q < 0.001, q < 0.01, q < 0.05], ["***", "**", "*"], ""),
+                                 index=top, columns=top)
+            limit = float(np.nanmax(np.abs(effect.to_numpy()))) if np.isfinite(effect.to_numpy()).any() else 1.0
+            fig_bench = px.imshow(effect, color_continuous_scale="RdBu", zmin=-limit, zmax=limit, aspect="auto",
+                                  labels={"x": "Compared with", "y": "Contractor", "color": "Cohen's d"},
+                                  title=f"{bench_metric}: effect size by contractor pair")
+            fig_bench.update_traces(text=stars.to_numpy(), texttemplate="%{text}")
+            st.plotly_chart(fig_bench, use_container_width=True)
+            significant = bench[(bench["q"] < 0.05) & (bench["diff"] > 0)]
+            with st.expander(f"📋 {len(significant):,} significant pairs", expanded=False):
+                st.dataframe(significant.assign(abs_d=significant["d"].abs()).sort_values("abs_d", ascending=False)
+                             .drop(columns=["Metric", "abs_d"]).round(4), hide_index=True, use_container_width=True)
+    except Exception as e:
+        st.error(f"Contractor benchmark error: {e}")
+
+
+# ---------- TAB 7: WHAT-IF SCENARIOS ----------
+with tabs[6]:
+    with st.expander("ℹ️ What does this section show?", expanded=False):
+        st.markdown("""
+### 🔮 What-If Scenarios
+
+Re-derives dilution and haul-off for every filtered well under a better DSRE:
+
+- **Dilution** scales with the solids left in the mud, i.e. with (1 − DSRE).
+- **Solids removed** scale with DSRE, and the fluid discarded on them keeps each well's discard ratio.
+- **Haul-off** = solids removed + fluid discarded, so better removal trades dilution for haul-off.
+- **Discard scale** models finer screens that carry less fluid on the cuttings.
+""")
+    st.markdown("### 🔮 What-If: Dilution & Cost Scenarios")
+
+    w1, w2, w3 = st.columns(3)
+    with w1:
+        scenario_target = st.radio("Apply upgrade to", ["Non-Derrick wells (swap to Derrick)", "All wells"])
+        uplift_range = st.slider("DSRE uplift (%)", 0, 50, (5, 20))
+        uplift_step = st.select_slider("Uplift step (%)", options=[1, 2.5, 5], value=2.5)
+    with w2:
+        discard_range = st.slider("Discard ratio scale", 0.5, 1.0, (0.8, 1.0), step=0.05)
+        st.caption("1.0 = today's fluid loss on cuttings; 0.8 = 20% less.")
+    with w3:
+        mud_cost = st.number_input("Dilution cost ($/bbl)", min_value=0.0, value=50.0, step=5.0)
+        haul_cost = st.number_input("Haul-off cost ($/bbl)", min_value=0.0, value=15.0, step=1.0)
+
+    # The baseline (0% uplift) is always simulated; a range starting at 0 mustn't repeat it.
+    uplifts = tuple(sorted({0.0, *(round(float(u) / 100, 4) for u in
+                                   np.arange(uplift_range[0], uplift_range[1] + 1e-9, uplift_step))}))
+    discard_scales = tuple(round(x, 2) for x in np.arange(discard_range[0], discard_range[1] + 1e-9, 0.05))
+    try:
+        scenario_rows, scenario_applies, scenario_summary = cached_scenarios(
+            version, state.key(), uplifts, discard_scales, scenario_target.startswith("Non-Derrick"), state, backend,
+        )
+        scenario_summary = with_costs(scenario_summary, mud_cost, haul_cost).assign(
+            Uplift=(scenario_summary["DSRE_Uplift"] * 100).round(1).astype(str) + "%",
+            Discard=scenario_summary["Discard_Scale"].map("×{:.2f}".format),
+        )
+
+        fig_savings = px.line(
+            scenario_summary, x="DSRE_Uplift", y="Savings", color="Discard", markers=True,
+            labels={"DSRE_Uplift": "DSRE uplift", "Savings": "Savings ($)", "Discard": "Discard scale"},
+            title=f"Projected savings across {len(scenario_rows):,} wells",
+        )
+        fig_savings.update_xaxes(tickformat=".0%")
+        st.plotly_chart(fig_savings, use_container_width=True)
+
+        st.markdown("#### 📋 Scenario Grid")
+        st.dataframe(
+            scenario_summary[["Uplift", "Discard", "Avg_DSRE", "Total_Dil", "Dilution_Saved", "Haul_OFF",
+                              "Haul_OFF_Change", "Total_Cost", "Savings"]].round(2),
+            use_container_width=True,
+        )
+
+        st.markdown("#### 🧾 Per-Well Projection")
+        chosen = st.select_slider("Scenario uplift", options=list(uplifts), value=uplifts[-1],
+                                  format_func=lambda u: f"{u * 100:.1f}%")
+        chosen_scale = st.select_slider("Scenario discard scale", options=list(discard_scales),
+                                        value=discard_scales[-1])
+        per_well = well_projection(scenario_rows, chosen, chosen_scale, applies=scenario_applies)
+        per_well.insert(0, "Well_Name", scenario_rows["Well_Name"])
+        st.dataframe(per_well.round(3), use_container_width=True)
+    except Exception as e:
+        st.error(f"Scenario engine error: {e}")
+
+startup.mark_first_render()
@@ -2,7 +2,6 @@
 import pandas as pd
 import streamlit as st
 import plotly.express as px
-import pydeck as pdk
 import os
 # Example CSV load
 data = pd.read_csv("sample_rig_dashboard_data.csv")
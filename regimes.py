@@ -0,0 +1,152 @@
+"""Performance regimes: mini-batch k-means over standardised interval metrics.
+
+Intervals are clustered on ``REGIME_FEATURES``. Heavy-tailed metrics are
+log-scaled first, every feature is standardised with a mean and standard
+deviation gathered in one streaming pass, and z-scores are clipped so a few
+extreme rows can't claim a centre of their own. Missing values sit at the
+feature mean.
+
+Centres are seeded with k-means++ on a uniform sample drawn across every
+chunk in that same pass (a file sorted by well or operator would otherwise
+seed every centre from its first rows), then fitted with mini-batch k-means
+(Sculley, 2010): each batch moves
+the centres it touches towards the batch mean by a step that shrinks with
+how many points that centre has already seen. The data is read through a
+``chunks`` callable that returns a fresh iterator of frames on every call,
+so a multi-million-row file is fitted and labelled chunk by chunk in
+bounded memory; an in-memory frame is just sliced.
+
+Each regime is named after its most distinctive features ("R1 · High ROP ·
+Low AMW") and the labels are stored as a categorical ``Regime`` column.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+REGIME_FEATURES = ["AMW", "Average_LGS%", "ROP", "DSRE", "Dilution_Ratio", "Hole_Size"]
+LOG_FEATURES = ["ROP", "Dilution_Ratio"]
+REGIME_COUNT = 5
+Z_CLIP = 4.0
+CHUNK_ROWS = 100_000
+
+
+class RegimeError(ValueError):
+    """The data can't be clustered: none of the features are present, or too few rows."""
+
+
+@dataclass
+class RegimeModel:
+    features: list
+    mean: np.ndarray
+    std: np.ndarray
+    centers: np.ndarray  # k x features, in standardised units
+    labels: list
+
+
+def _transform(frame, features):
+    # A writable copy: with copy-on-write, to_numpy() can hand back a read-only view.
+    values = np.array(frame.reindex(columns=features), dtype=float)
+    for i, col in enumerate(features):
+        if col in LOG_FEATURES:
+            values[:, i] = np.log1p(np.clip(values[:, i], 0, None))
+    return values
+
+
+def _standardise(values, model):
+    z = (values - model.mean) / model.std
+    return np.clip(np.nan_to_num(z, nan=0.0), -Z_CLIP, Z_CLIP)
+
+
+def _nearest(z, centers):
+    distances = (z * z).sum(axis=1)[:, None] - 2 * z @ centers.T + (centers * centers).sum(axis=1)[None, :]
+    return distances.argmin(axis=1)
+
+
+def _name(centers, features):
+    names = []
+    for i, center in enumerate(centers, start=1):
+        top = np.argsort(-np.abs(center))[:2]
+        traits = [f"{'High' if center[j] > 0 else 'Low'} {features[j]}" for j in top if abs(center[j]) >= 0.5]
+        names.append(" · ".join([f"R{i}"] + (traits or ["Typical"])))
+    return names
+
+
+def fit_regimes(chunks, k=REGIME_COUNT, features=REGIME_FEATURES, batch_size=1024, epochs=3, seed=0):
+    """Fit a ``RegimeModel``; ``chunks()`` must return a fresh iterable of frames each call."""
+    count = total = squares = 0.0
+    features = list(features)
+    rng = np.random.default_rng(seed)
+    # Uniform sample for seeding: the batch_size rows with the smallest random keys.
+    sample = keys = None
+    for frame in chunks():
+        features = [col for col in features if col in frame.columns]
+        values = _transform(frame, features)
+        valid = np.isfinite(values)
+        count = count + valid.sum(axis=0)
+        total = total + np.where(valid, values, 0.0).sum(axis=0)
+        squares = squares + np.where(valid, values ** 2, 0.0).sum(axis=0)
+        if sample is None or sample.shape[1] != values.shape[1]:
+            sample, keys = np.empty((0, values.shape[1])), np.empty(0)
+        sample, keys = np.vstack([sample, values]), np.concatenate([keys, rng.random(len(values))])
+        keep = np.argsort(keys)[:batch_size]
+        sample, keys = sample[keep], keys[keep]
+    if not features:
+        raise RegimeError(f"None of the regime features {REGIME_FEATURES} are in the data")
+    if sample is None or len(sample) < k:
+        raise RegimeError(f"Need at least {k} rows to find {k} regimes")
+    mean = total / np.maximum(count, 1)
+    std = np.sqrt(np.maximum(squares / np.maximum(count, 1) - mean ** 2, 0.0))
+    model = RegimeModel(features=features, mean=mean, std=np.where(std > 0, std, 1.0), centers=None, labels=[])
+    model.centers = _plus_plus(_standardise(sample, model), k, rng)
+
+    seen = np.zeros(k)
+    for _ in range(epochs):
+        for frame in chunks():
+            z = _standardise(_transform(frame, features), model)
+            z = z[rng.permutation(len(z))]
+            for start in range(0, len(z), batch_size):
+                batch = z[start:start + batch_size]
+                nearest = _nearest(batch, model.centers)
+                hits = np.bincount(nearest, minlength=k)
+                sums = np.stack([np.bincount(nearest, weights=batch[:, j], minlength=k)
+                                 for j in range(batch.shape[1])], axis=1)
+                seen += hits
+                touched = hits > 0
+                step = (hits[touched] / seen[touched])[:, None]
+                model.centers[touched] += step * (sums[touched] / hits[touched, None] - model.centers[touched])
+
+    # Stable, readable order: best DSRE first when it is a feature.
+    order = np.argsort(-model.centers[:, features.index("DSRE")]) if "DSRE" in features else np.arange(k)
+    model.centers = model.centers[order]
+    model.labels = _name(model.centers, features)
+    return model
+
+
+def _plus_plus(z, k, rng):
+    """k-means++ seeding on a sample."""
+    centers = [z[rng.integers(len(z))]]
+    for _ in range(1, k):
+        d2 = ((z[:, None, :] - np.array(centers)[None, :, :]) ** 2).sum(axis=2).min(axis=1)
+        probs = d2 / d2.sum() if d2.sum() > 0 else None
+        centers.append(z[rng.choice(len(z), p=probs)])
+    return np.array(centers)
+
+
+def assign_regimes(df, model):
+    """Categorical regime label for every row of ``df``."""
+    codes = _nearest(_standardise(_transform(df, model.features), model), model.centers)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=model.labels), index=df.index, name="Regime")
+
+
+def frame_chunks(df, rows=CHUNK_ROWS):
+    """A ``chunks`` callable over an in-memory frame."""
+    return lambda: (df.iloc[start:start + rows] for start in range(0, len(df), rows))
+
+
+def add_regimes(df, k=REGIME_COUNT):
+    """``df`` with a categorical ``Regime`` column, or unchanged if it lacks the features."""
+    if not any(col in df.columns for col in REGIME_FEATURES) or len(df) < k:
+        return df
+    model = fit_regimes(frame_chunks(df), k=k)
+    return df.assign(Regime=assign_regimes(df, model))
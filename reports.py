@@ -0,0 +1,213 @@
+"""Batch performance packs, one per Operator (or Contractor).
+
+Each report has the Key Metrics (including every KPI from ``kpis.json``) next
+to the fleet average, the dilution breakdown, the Derrick vs Non-Derrick
+comparison and the wells ranked by Efficiency Score. Reports render in a
+process pool. The dataset is loaded and split into per-group row indexes once
+in the parent, before the pool starts, so forked workers share it
+copy-on-write instead of each re-reading the file (on platforms without fork
+the pool initializer loads it per worker).
+
+    python reports.py                        # every Operator, HTML, all cores
+    python reports.py --by Contractor --out packs --workers 4
+    python reports.py --format pdf           # needs weasyprint + kaleido
+
+Progress is printed as reports finish; ``--workers 1`` renders serially for
+comparison.
+"""
+import argparse
+import base64
+import html
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import plotly.express as px
+
+from analytics import derrick_comparison, efficiency_ranking
+from backends import DEFAULT_DATA_PATH, read_data
+from kpis import KPIS_PATH, add_kpis, compile_kpis, load_kpis
+
+REPORT_METRICS = [
+    ("Avg Total Dilution (BBLs)", "Total_Dil"),
+    ("Avg SCE", "Total_SCE"),
+    ("Avg DSRE", "DSRE"),
+    ("Avg Dilution Ratio", "Dilution_Ratio"),
+    ("Avg Discard Ratio", "Discard Ratio"),
+    ("Avg ROP", "ROP"),
+]
+DILUTION_PARTS = ["Base_Oil", "Water", "Weight_Material", "Chemicals"]
+COMPARISON_METRICS = ["DSRE", "Discard Ratio", "Total_SCE", "Total_Dil", "ROP", "Dilution_Ratio"]
+TOP_WELLS = 30
+
+_STYLE = """
+body { font-family: Helvetica, Arial, sans-serif; margin: 2em; color: #1c1c1c; }
+h1 { margin-bottom: 0; } .sub { color: #666; margin-top: .2em; }
+table { border-collapse: collapse; margin: 1em 0; font-size: .9em; }
+th, td { border: 1px solid #ddd; padding: 4px 10px; text-align: right; }
+th:first-child, td:first-child { text-align: left; }
+.metrics td:last-child { color: #666; }
+footer { margin-top: 3em; color: #888; font-size: .8em; }
+"""
+
+# Set in the parent before the pool forks, or by _init_worker under spawn.
+_DATA = None
+_GROUPS = None
+
+
+def _load(path, by):
+    global _DATA, _GROUPS
+    data = read_data(path)
+    _DATA = add_kpis(data, compile_kpis(load_kpis(KPIS_PATH), data.columns)[0])
+    _GROUPS = _DATA.groupby(by, sort=True).indices
+
+
+def _init_worker(path, by):
+    if _DATA is None:
+        _load(path, by)
+
+
+def slugify(name):
+    return re.sub(r"[^A-Za-z0-9]+", "_", str(name)).strip("_") or "unnamed"
+
+
+def file_names(groups):
+    """``{group: slug}``, unique even where names differ only in punctuation or case.
+
+    "Devon Energy" and "Devon Energy " both slugify to ``Devon_Energy``; the
+    second (in ``groups`` order) becomes ``Devon_Energy_2``.
+    """
+    names, taken = {}, set()
+    for group in groups:
+        base = name = slugify(group)
+        suffix = 1
+        while name.lower() in taken:
+            suffix += 1
+            name = f"{base}_{suffix}"
+        taken.add(name.lower())
+        names[group] = name
+    return names
+
+
+def _figure_html(fig, fmt, include_js=False):
+    if fmt == "pdf":
+        try:
+            png = fig.to_image(format="png", width=1000, height=450)
+        except ValueError as e:
+            raise ImportError("PDF reports need the 'kaleido' package installed") from e
+        return f'<img src="data:image/png;base64,{base64.b64encode(png).decode()}" width="100%">'
+    return fig.to_html(full_html=False, include_plotlyjs="cdn" if include_js else False)
+
+
+def render_report(rows, fleet, title, fmt="html"):
+    """HTML for one group's performance pack; ``fleet`` is the whole dataset for comparison."""
+    well_col = "Canonical_Well" if "Canonical_Well" in rows.columns else "Well_Name"
+    metrics = []
+    kpi_metrics = [(f"Avg {name}", name) for name in load_kpis(KPIS_PATH) if name in rows.columns]
+    for label, col in REPORT_METRICS + kpi_metrics:
+        if col in rows.columns:
+            value, overall = rows[col].mean(), fleet[col].mean()
+            fmt_value = "{:.1%}" if col == "DSRE" else "{:,.2f}"
+            metrics.append((label, fmt_value.format(value), fmt_value.format(overall)))
+    metrics_rows = "".join(f"<tr><td>{html.escape(label)}</td><td>{value}</td><td>{overall}</td></tr>"
+                           for label, value, overall in metrics)
+
+    parts = [col for col in DILUTION_PARTS if col in rows.columns]
+    dilution = rows.groupby(well_col)[parts].sum()
+    dilution = dilution.loc[dilution.sum(axis=1).sort_values(ascending=False).index[:TOP_WELLS]]
+    dilution_fig = px.bar(dilution.reset_index(), x=well_col, y=parts, barmode="stack", height=450,
+                          title=f"Dilution Breakdown (top {min(TOP_WELLS, len(dilution))} wells by volume)",
+                          color_discrete_sequence=px.colors.qualitative.Set2)
+
+    comparison = derrick_comparison(rows, COMPARISON_METRICS)
+    comparison_fig = px.bar(comparison.melt(id_vars="Metric", var_name="Shaker", value_name="Average"),
+                            x="Metric", y="Average", color="Shaker", barmode="group", height=450,
+                            title="Derrick vs Non-Derrick", color_discrete_sequence=["#2ca02c", "#d62728"])
+
+    ranked = efficiency_ranking(rows.assign(Well_Name=rows[well_col]))
+    ranked = ranked.groupby(["Well_Name", "Shaker_Type"], as_index=False)["Efficiency Score"].mean()
+    ranked = ranked.sort_values("Efficiency Score", ascending=False).reset_index(drop=True)
+    ranked.index += 1
+
+    wells = rows[well_col].nunique()
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{html.escape(title)}</title><style>{_STYLE}</style></head>
+<body>
+<h1>{html.escape(title)}</h1>
+<p class="sub">{len(rows):,} intervals across {wells:,} wells</p>
+<h2>Key Metrics</h2>
+<table class="metrics"><tr><th>Metric</th><th>This group</th><th>Fleet</th></tr>{metrics_rows}</table>
+<h2>Dilution Breakdown</h2>
+{_figure_html(dilution_fig, fmt, include_js=True)}
+<h2>Derrick vs Non-Derrick</h2>
+{_figure_html(comparison_fig, fmt)}
+{comparison.round(3).to_html(index=False, na_rep="–")}
+<h2>Ranked Wells</h2>
+{ranked.round(2).to_html(index_names=False)}
+<footer>&copy; 2025 Derrick Corp | Designed for drilling performance insights</footer>
+</body></html>"""
+
+
+def _write_report(group, name, by, out_dir, fmt):
+    start = time.perf_counter()
+    rows = _DATA.iloc[_GROUPS[group]]
+    page = render_report(rows, _DATA, f"{by}: {group}", fmt)
+    path = os.path.join(out_dir, f"{name}.{fmt}")
+    if fmt == "pdf":
+        try:
+            from weasyprint import HTML
+        except ImportError as e:
+            raise ImportError("PDF reports need the 'weasyprint' package installed") from e
+        HTML(string=page).write_pdf(path)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(page)
+    return group, path, time.perf_counter() - start
+
+
+def generate_reports(path=DEFAULT_DATA_PATH, by="Operator", out_dir="reports", fmt="html", workers=None,
+                     progress=print):
+    """Render one report per ``by`` value; returns ``{group: path}``."""
+    os.makedirs(out_dir, exist_ok=True)
+    _load(path, by)
+    groups = list(_GROUPS)
+    names = file_names(groups)
+    done = {}
+    if workers == 1:
+        for group in groups:
+            group, report, seconds = _write_report(group, names[group], by, out_dir, fmt)
+            done[group] = report
+            progress(f"[{len(done)}/{len(groups)}] {group} -> {report} ({seconds:.1f}s)")
+        return done
+
+    context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(path, by)) as pool:
+        futures = [pool.submit(_write_report, group, names[group], by, out_dir, fmt) for group in groups]
+        for future in as_completed(futures):
+            group, report, seconds = future.result()
+            done[group] = report
+            progress(f"[{len(done)}/{len(groups)}] {group} -> {report} ({seconds:.1f}s)")
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=os.environ.get("RIG_DATA", DEFAULT_DATA_PATH))
+    parser.add_argument("--by", default="Operator", choices=["Operator", "Contractor"])
+    parser.add_argument("--out", default="reports", help="output directory")
+    parser.add_argument("--format", default="html", choices=["html", "pdf"])
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores; 1 = serial)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    reports = generate_reports(args.data, args.by, args.out, args.format, args.workers)
+    print(f"Wrote {len(reports)} reports to {args.out}/ in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""Fast diffs between two versions of the merged well data.
+
+Each row is reduced to two 64-bit hashes with ``pd.util.hash_pandas_object``:
+one of its key columns (a well interval is ``Well_Job_ID`` + ``API Number`` +
+``Hole_Size``) and one of everything else. Added, removed and changed rows
+then fall out of hash-table lookups on those integers in linear time; only
+the changed rows are compared column by column. Nothing is merged across all
+columns.
+
+    python snapshots.py old.csv new.csv
+"""
+import argparse
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from backends import read_data
+
+SNAPSHOT_KEYS = ["Well_Job_ID", "API Number", "Hole_Size"]
+IMPACT_METRICS = ["Total_Dil", "Total_SCE", "DSRE", "Dilution_Ratio", "Discard Ratio", "Haul_OFF"]
+# Positional/derived columns that change whenever the file is regenerated.
+IGNORED_COLUMNS = ["Unnamed: 0", "TD_Year", "TD_Month", "Anomaly_Score", "Anomaly_Reason", "Is_Outlier",
+                   "Anomaly_IForest", "Well_ID", "Canonical_Well", "Regime"]
+
+
+@dataclass
+class SnapshotDiff:
+    added: pd.DataFrame  # rows only in the new snapshot
+    removed: pd.DataFrame  # rows only in the old snapshot
+    changed: pd.DataFrame  # long form: keys, column, old, new, delta
+    impact: pd.DataFrame  # per metric: old/new mean and the delta split by cause
+    changed_rows: int = 0
+
+    def counts(self):
+        return {"added": len(self.added), "removed": len(self.removed), "changed": self.changed_rows}
+
+
+def _row_hashes(df, columns):
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+def _keys(df, keys, row_hash):
+    """One hash per row of its key columns.
+
+    Rows sharing a key are told apart by their rank in content-hash order, so
+    identical duplicates pair up no matter how the file was reordered.
+    """
+    # Numeric keys hash as float so an int column in one file matches a float one in the other.
+    frame = pd.DataFrame({col: df[col].astype(float) if pd.api.types.is_numeric_dtype(df[col]) else df[col]
+                          for col in keys})
+    key_hash = _row_hashes(frame, keys) if keys else np.zeros(len(df), dtype=np.uint64)
+    order = np.lexsort((row_hash, key_hash))
+    sorted_keys = key_hash[order]
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    occurrence = np.empty(len(df), dtype=np.uint64)
+    occurrence[order] = np.arange(len(df)) - np.repeat(starts, np.diff(np.r_[starts, len(df)]))
+    return pd.util.hash_array(key_hash ^ (occurrence * np.uint64(0x9E3779B97F4A7C15)))
+
+
+def _mean(df, mask, column):
+    if column not in df.columns:
+        return np.nan
+    return df.loc[mask, column].mean()
+
+
+def diff(old, new, keys=SNAPSHOT_KEYS, metrics=IMPACT_METRICS):
+    """Compare two snapshots; see ``SnapshotDiff``."""
+    keys = [col for col in keys if col in old.columns and col in new.columns]
+    shared = [col for col in old.columns if col in new.columns and col not in IGNORED_COLUMNS]
+    compared = [col for col in shared if col not in keys]
+    old_hash = _row_hashes(old, compared)
+    new_hash = _row_hashes(new, compared)
+    old_key = _keys(old, keys, old_hash)
+    new_key = _keys(new, keys, new_hash)
+
+    # Hash-table lookups: position of each new key in old (-1 if absent) and vice versa.
+    old_index = pd.Index(old_key)
+    if not old_index.is_unique:
+        raise ValueError("Snapshot keys are not unique after disambiguation")
+    in_old = old_index.get_indexer(new_key)
+    in_new = pd.Index(new_key).get_indexer(old_key)
+
+    added_mask = in_old < 0
+    removed_mask = in_new < 0
+    common_new = np.flatnonzero(~added_mask)
+    common_old = in_old[common_new]
+
+    changed_sel = old_hash[common_old] != new_hash[common_new]
+    changed_new = common_new[changed_sel]
+    changed_old = common_old[changed_sel]
+
+    # Column-level deltas, only for rows whose hash moved.
+    before = old[compared].iloc[changed_old].reset_index(drop=True)
+    after = new[compared].iloc[changed_new].reset_index(drop=True)
+    differs = ~((before == after) | (before.isna() & after.isna()))
+    rows, cols = np.nonzero(differs.to_numpy())
+    changed = new[keys].iloc[changed_new[rows]].reset_index(drop=True)
+    changed["column"] = np.asarray(compared, dtype=object)[cols]
+    changed["old"] = before.to_numpy(dtype=object)[rows, cols]
+    changed["new"] = after.to_numpy(dtype=object)[rows, cols]
+    changed["delta"] = pd.to_numeric(changed["new"], errors="coerce") - pd.to_numeric(changed["old"], errors="coerce")
+
+    # How the headline means moved, and how much of that each kind of change explains:
+    # replay old -> remove -> add -> revise and attribute each step's shift.
+    impact = []
+    n_old = len(old)
+    kept_old = ~removed_mask
+    for metric in metrics:
+        if metric not in old.columns or metric not in new.columns:
+            continue
+        old_mean = old[metric].mean()
+        new_mean = new[metric].mean()
+        after_removal = _mean(old, kept_old, metric)
+        after_addition = pd.concat([old.loc[kept_old, metric], new.loc[added_mask, metric]]).mean()
+        impact.append({
+            "Metric": metric,
+            "Old": old_mean,
+            "New": new_mean,
+            "Delta": new_mean - old_mean,
+            "From_Removed": after_removal - old_mean,
+            "From_Added": after_addition - after_removal,
+            "From_Changed": new_mean - after_addition,
+        })
+    impact.append({"Metric": "Rows", "Old": n_old, "New": len(new), "Delta": len(new) - n_old,
+                   "From_Removed": -int(removed_mask.sum()), "From_Added": int(added_mask.sum()), "From_Changed": 0})
+
+    return SnapshotDiff(
+        added=new[added_mask],
+        removed=old[removed_mask],
+        changed=changed,
+        impact=pd.DataFrame(impact),
+        changed_rows=len(changed_new),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("old")
+    parser.add_argument("new")
+    args = parser.parse_args(argv)
+
+    result = diff(read_data(args.old), read_data(args.new))
+    print(result.counts())
+    print(result.impact.round(4).to_string(index=False))
+    if len(result.changed):
+        print("\nMost revised columns:")
+        print(result.changed["column"].value_counts().head(10).to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
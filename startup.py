@@ -0,0 +1,210 @@
+"""Cold-start path for the dashboard.
+
+``mapp.py`` gets its data through the cached loaders defined here. Streamlit's
+caches live for the whole server process, so a background thread can fill
+them before the first browser connects: the data parse, anomaly scores, well
+ids, regimes and KPI columns, the search index, the cascade options, the
+default and saved views and the default driver regression. Heavy modules
+(pandas, plotly) are imported on that thread too, not on the import path of
+this module.
+
+Launch through this module so warm-up starts while the server boots:
+
+    python startup.py mapp.py [streamlit options]
+
+(``streamlit run mapp.py`` also works; warm-up then starts with the first
+session.) Each step's duration is logged and kept in ``TIMINGS`` for the
+dashboard to display.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+BOOT = time.perf_counter()
+logger = logging.getLogger("rig.startup")
+
+# backends.DEFAULT_DATA_PATH, spelled out so importing this module doesn't pull in pandas.
+DATA_PATH = os.environ.get("RIG_DATA", "Updated_Merged_Data_with_API_and_Location.csv")
+# RIG_BACKEND=sqlite|duckdb pushes filters and aggregates into an embedded engine;
+# pandas keeps the whole file in memory and is the default.
+BACKEND_KIND = os.environ.get("RIG_BACKEND", "pandas").lower()
+ANOMALY_MODEL = os.environ.get("RIG_ANOMALY_MODEL")  # "iforest" adds an IsolationForest score
+ROW_LIMIT = None if BACKEND_KIND == "pandas" else 50_000  # rows pulled in for row-level charts
+VIEW_CACHE_MB = int(os.environ.get("RIG_VIEW_CACHE_MB", "256"))  # budget for cached view rows, all sessions
+
+TIMINGS = {}  # step -> seconds, in the order the steps finished
+_warm_lock = threading.Lock()
+_warm_thread = None
+_views = OrderedDict()  # (version, view key, row limit) -> (rows, key metrics, bytes), least recent first
+_views_lock = threading.Lock()
+_views_bytes = 0
+
+
+def mark(step, started):
+    """Record how long ``step`` took since ``started`` (a ``perf_counter`` value)."""
+    TIMINGS[step] = time.perf_counter() - started
+    logger.info("startup: %s took %.2fs (%.2fs after boot)", step, TIMINGS[step], time.perf_counter() - BOOT)
+
+
+def mark_first_render():
+    """Called at the end of a script run; only the first one is recorded."""
+    if "first render" not in TIMINGS:
+        TIMINGS["first render"] = time.perf_counter() - BOOT
+        logger.info("startup: first render finished %.2fs after boot", TIMINGS["first render"])
+
+
+@st.cache_resource
+def load_backend(kind, path, version, anomaly_model=None):
+    from functools import partial
+
+    from analytics import ANOMALY_INPUTS, score_anomalies
+    from backends import open_backend
+
+    # Scored once per data version; views only compare against the stored score.
+    return open_backend(kind, path, score=partial(score_anomalies, model=anomaly_model), score_inputs=ANOMALY_INPUTS)
+
+
+@st.cache_resource
+def get_backend(kind, path, version, anomaly_model=None, kpis=()):
+    """``load_backend`` plus a column per KPI in ``kpis`` (``(name, expression)`` pairs).
+
+    Editing a KPI recomputes only the KPI columns, not the load and scoring.
+    """
+    backend = load_backend(kind, path, version, anomaly_model).with_kpis(kpis)
+    backend.warm()
+    return backend
+
+
+def open_data(kind=BACKEND_KIND, path=DATA_PATH, anomaly_model=ANOMALY_MODEL):
+    """``(version, backend)`` for the current data file and KPI definitions.
+
+    ``version`` covers both, so per-view caches keyed on it drop rows computed
+    under an older KPI definition.
+    """
+    from backends import data_version
+    from kpis import KPIS_PATH, definitions_key, load_kpis
+
+    version = data_version(path)
+    kpis = tuple(load_kpis(KPIS_PATH).items())
+    return f"{version}-{definitions_key(kpis)}", get_backend(kind, path, version, anomaly_model, kpis)
+
+
+def view_results(version, view_key, row_limit, state, backend):
+    """Rows and Key Metrics for one filter state, shared by every session that opens the same view.
+
+    Results are handed out by reference; views must treat them as read-only.
+    The cache is bounded by the rows' size (``VIEW_CACHE_MB``), not by a
+    count of views, and drops the least recently used view first; the most
+    recent one is always kept.
+    """
+    global _views_bytes
+    key = (version, view_key, row_limit)
+    with _views_lock:
+        if key in _views:
+            _views.move_to_end(key)
+            return _views[key][:2]
+    rows = backend.rows(state, limit=row_limit)
+    key_metrics = backend.aggregate(state, ["Total_Dil", "Total_SCE", "DSRE"]).iloc[0]
+    # Shallow size: a filtered pandas frame shares its string objects with the source.
+    size = int(rows.memory_usage(index=True).sum())
+    with _views_lock:
+        if key not in _views:
+            _views[key] = (rows, key_metrics, size)
+            _views_bytes += size
+        while _views_bytes > VIEW_CACHE_MB * 2 ** 20 and len(_views) > 1:
+            _views_bytes -= _views.popitem(last=False)[1][2]
+    return rows, key_metrics
+
+
+@st.cache_data
+def cached_driver_regression(version, target, by, _backend):
+    from analytics import DRIVER_FEATURES, driver_regression_from_moments
+    from backends import FilterState
+
+    # Only per-group sums leave the backend; centring on the means keeps them well conditioned.
+    center = _backend.aggregate(FilterState(), DRIVER_FEATURES, "mean").iloc[0].to_dict()
+    moments = _backend.cross_products(FilterState(), [target] + DRIVER_FEATURES, by, center=center)
+    return driver_regression_from_moments(moments, target, DRIVER_FEATURES, by)
+
+
+def warm(kind=BACKEND_KIND, path=DATA_PATH, anomaly_model=ANOMALY_MODEL):
+    """Fill the caches the first page view needs, timing each step."""
+    started = time.perf_counter()
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    mark("import pandas", started)
+
+    started = time.perf_counter()
+    import plotly.express  # noqa: F401
+    mark("import plotly", started)
+
+    from backends import CASCADE, FilterState
+    from views import VIEWS_PATH, load_views
+
+    started = time.perf_counter()
+    version, backend = open_data(kind, path, anomaly_model)
+    mark("load data", started)
+
+    started = time.perf_counter()
+    default = FilterState()
+    for _, column in CASCADE:
+        backend.options(column, default)
+    view_results(version, default.key(), ROW_LIMIT, default, backend)
+    mark("default view", started)
+
+    started = time.perf_counter()
+    for entry in load_views(VIEWS_PATH).values():
+        try:
+            state = FilterState.from_params(entry["params"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        view_results(version, state.key(), ROW_LIMIT, state, backend)
+    mark("saved views", started)
+
+    started = time.perf_counter()
+    cached_driver_regression(version, "DSRE", "Contractor", backend)
+    mark("driver regression", started)
+    TIMINGS["warm-up"] = time.perf_counter() - BOOT
+
+
+def _warm_safely(*args):
+    try:
+        warm(*args)
+    except Exception:
+        # The first session will hit the same error and show it; don't take the server down.
+        logger.exception("startup: warm-up failed")
+
+
+def warm_in_background(kind=BACKEND_KIND, path=DATA_PATH, anomaly_model=ANOMALY_MODEL):
+    """Start ``warm`` on a daemon thread, once per process."""
+    global _warm_thread
+    with _warm_lock:
+        if _warm_thread is None:
+            _warm_thread = threading.Thread(target=_warm_safely, args=(kind, path, anomaly_model),
+                                            name="rig-warm-up", daemon=True)
+            _warm_thread.start()
+    return _warm_thread
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print(__doc__)
+        return 2
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    # Run as a script this file is __main__; warm the importable module that mapp.py shares.
+    import startup
+    startup.warm_in_background()
+    from streamlit.web import cli
+
+    sys.argv = ["streamlit", "run", *argv]
+    return cli.main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
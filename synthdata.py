@@ -0,0 +1,257 @@
+"""Schema-faithful synthetic well data for scale testing.
+
+Learns from the merged CSV:
+
+- the schema and column order, including which columns are keys, names,
+  dates, categoricals or continuous metrics;
+- each column's marginal distribution (empirical quantiles for numbers,
+  frequencies for categories) and its null rate;
+- the dependence between columns, as a Gaussian copula over normal scores.
+  Nulls sit at the bottom of each column's latent scale, so columns that go
+  missing together (coordinates, API Number, County/State Code) keep doing so.
+
+Rows are then generated in fixed-size chunks and appended to a CSV or Parquet
+file, so memory stays bounded whatever the row count, and the same seed always
+produces the same file:
+
+    python synthdata.py --rows 1000000 --out synthetic_1m.parquet
+    python synthdata.py --rows 100000 --out synthetic_100k.csv --seed 7
+"""
+import argparse
+import math
+import os
+import sys
+from dataclasses import dataclass, field
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from backends import DATE_FORMAT, DEFAULT_DATA_PATH, parse_dates
+
+CATEGORICAL_MAX_LEVELS = 40  # numeric columns with fewer distinct values are treated as categories
+WELL_COLUMN = "Well_Name"  # categories that never vary within a source well are drawn once per well
+
+_normal = NormalDist()
+
+
+@dataclass
+class ColumnModel:
+    name: str
+    kind: str  # "key", "name", "date", "categorical" or "numeric"
+    null_rate: float = 0.0
+    values: np.ndarray = None  # sorted quantile support, category levels or name stems
+    probs: np.ndarray = None  # category probabilities, same order as values
+    integral: bool = False
+    per_well: bool = False  # categorical that is constant within every well of the source
+    start: int = 0  # first value for key columns and digit-only identifiers
+    width: int = 0  # zero-padded width of digit-only identifiers such as API Number
+
+
+@dataclass
+class SyntheticModel:
+    columns: list
+    corr: np.ndarray = field(repr=False, default=None)
+    well_share: float = 1.0  # distinct wells per row; identifiers repeat across a well's intervals
+
+
+def _norm_cdf(z):
+    # Abramowitz & Stegun 7.1.26, |error| < 1.5e-7; vectorised, no SciPy needed.
+    x = np.abs(z) / math.sqrt(2)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-x * x)
+    return 0.5 * (1.0 + np.sign(z) * erf)
+
+
+def _norm_ppf(u):
+    return np.array([_normal.inv_cdf(min(max(p, 1e-9), 1 - 1e-9)) for p in u])
+
+
+def _classify(series):
+    nonnull = series.dropna()
+    if nonnull.empty:
+        return "categorical"
+    unique_share = nonnull.nunique() / len(nonnull)
+    if pd.api.types.is_numeric_dtype(series):
+        integral = bool(np.all(np.mod(nonnull, 1) == 0))
+        if integral and unique_share > 0.95:
+            return "key"
+        if nonnull.nunique() <= CATEGORICAL_MAX_LEVELS:
+            return "categorical"
+        return "numeric"
+    if "date" in series.name.lower():
+        return "date"
+    return "name" if unique_share > 0.5 else "categorical"
+
+
+def fit(df):
+    """Learn a ``SyntheticModel`` from a sample frame."""
+    columns, scores, name_shares = [], {}, []
+    n = len(df)
+    for name in df.columns:
+        series = df[name]
+        kind = _classify(series)
+        model = ColumnModel(name=name, kind=kind, null_rate=float(series.isna().mean()))
+        if kind == "date":
+            parsed = parse_dates(series)
+            model.null_rate = float(parsed.isna().mean())
+            series = (parsed - pd.Timestamp("1970-01-01")).dt.days.astype(float)
+            model.integral = True
+        if kind in ("key", "name"):
+            # Only the null pattern of identifiers joins the copula.
+            nulls = series.isna().to_numpy()
+            u = np.where(nulls, model.null_rate / 2, (1 + model.null_rate) / 2)
+            scores[name] = _norm_ppf(u)
+        if kind == "key":
+            model.start = int(pd.to_numeric(series).min())
+        elif kind == "name":
+            text = series.dropna().astype(str)
+            model.values = text.unique()
+            digits = text[text.str.fullmatch(r"\d+")]
+            if len(digits) > 0.9 * len(text):
+                model.width = int(digits.str.len().median())
+                model.start = int(digits.astype("int64").min())
+            name_shares.append(len(model.values) / max(len(text), 1))
+        elif kind == "categorical":
+            freq = series.value_counts(dropna=False, normalize=True)
+            # Nulls first, then levels by frequency, so the latent scale puts nulls lowest.
+            items = sorted(freq.items(), key=lambda item: (not pd.isna(item[0]), -item[1]))
+            model.values = np.array([value for value, _ in items], dtype=object)
+            model.probs = np.array([prob for _, prob in items], dtype=float)
+            cum = np.concatenate([[0.0], np.cumsum(model.probs)])
+            mids = (cum[:-1] + cum[1:]) / 2
+            nulls = series.isna().to_numpy()
+            u = np.empty(n)
+            u[~nulls] = series[~nulls].map({v: m for v, m in zip(model.values, mids) if not pd.isna(v)})
+            u[nulls] = mids[0]
+            scores[name] = _norm_ppf(u)
+            if WELL_COLUMN in df.columns and name != WELL_COLUMN:
+                levels = series.groupby(df[WELL_COLUMN], dropna=True).nunique(dropna=False)
+                model.per_well = bool((levels > 1).sum() == 0 and (df[WELL_COLUMN].value_counts() > 1).any())
+        if kind in ("numeric", "date"):
+            nonnull = series.dropna().to_numpy(dtype=float)
+            model.values = np.sort(nonnull)
+            if kind == "numeric":
+                model.integral = bool(np.all(np.mod(nonnull, 1) == 0))
+            # Mid-ranks: nulls share the bottom slice, observed values fill the rest.
+            ranks = series.rank(method="average").to_numpy()
+            u = np.where(np.isnan(ranks), model.null_rate / 2,
+                         model.null_rate + (1 - model.null_rate) * (ranks - 0.5) / max(len(nonnull), 1))
+            scores[name] = _norm_ppf(u)
+        columns.append(model)
+
+    latent = pd.DataFrame({col.name: scores[col.name] for col in columns})
+    corr = latent.corr().fillna(0.0).to_numpy(copy=True)
+    np.fill_diagonal(corr, 1.0)
+    # Pairwise correlations need not be positive definite; clip the spectrum.
+    vals, vecs = np.linalg.eigh(corr)
+    corr = vecs @ np.diag(np.clip(vals, 1e-6, None)) @ vecs.T
+    d = np.sqrt(np.diag(corr))
+    return SyntheticModel(columns=columns, corr=corr / np.outer(d, d),
+                          well_share=float(np.mean(name_shares)) if name_shares else 1.0)
+
+
+def _chunk(model, rows, offset, rng, carry=None):
+    """``rows`` synthetic rows starting at row ``offset``.
+
+    ``carry`` holds the per-well values of the previous chunk's last well, so a
+    well that straddles two chunks keeps them.
+    """
+    z = rng.multivariate_normal(np.zeros(len(model.columns)), model.corr, size=rows, method="cholesky")
+    u = _norm_cdf(z)
+    out = {}
+    index = np.arange(offset, offset + rows)
+    # Consecutive rows share a well, like a well's intervals in the source; every
+    # identifier column is derived from the same well number so they stay consistent.
+    wells = (index * model.well_share).astype(np.int64)
+    _, first, inverse = np.unique(wells, return_index=True, return_inverse=True)
+    continued = carry is not None and carry["well"] == wells[0]
+    for i, col in enumerate(model.columns):
+        p = u[:, i]
+        if col.kind == "key":
+            values = pd.Series(col.start + index, dtype="Int64")
+            values[p < col.null_rate] = pd.NA
+            out[col.name] = values
+        elif col.kind == "name":
+            if col.width:
+                values = pd.Series(col.start + wells).astype(str).str.zfill(col.width)
+            else:
+                stems = col.values[wells % len(col.values)]
+                values = pd.Series(stems, dtype=object) + "-S" + pd.Series(wells).astype(str)
+            values[p < col.null_rate] = None
+            out[col.name] = values
+        elif col.kind == "categorical":
+            cum = np.cumsum(col.probs)
+            picks = np.minimum(np.searchsorted(cum, p), len(col.values) - 1)
+            values = col.values[picks]
+            if col.per_well:
+                # Every interval of a well takes its first interval's draw.
+                values = values[first][inverse]
+                if continued:
+                    values[wells == wells[0]] = carry[col.name]
+            out[col.name] = pd.Series(values)
+        else:
+            inner = np.clip((p - col.null_rate) / max(1 - col.null_rate, 1e-12), 0, 1)
+            n = len(col.values)
+            values = np.interp(inner * n - 0.5, np.arange(n), col.values) if n else np.full(rows, np.nan)
+            if col.integral:
+                values = np.round(values)
+            values = np.where(p < col.null_rate, np.nan, values)
+            if col.kind == "date":
+                dates = pd.to_datetime(values, unit="D", origin="unix")
+                out[col.name] = pd.Series(dates.strftime(DATE_FORMAT)).where(~np.isnan(values), None)
+            elif col.integral:
+                out[col.name] = pd.Series(values).astype("Int64")
+            else:
+                out[col.name] = values
+    return pd.DataFrame(out)
+
+
+def generate(model, rows, path, seed=0, chunksize=100_000):
+    """Stream ``rows`` synthetic rows to ``path`` (``.csv`` or ``.parquet``)."""
+    writer = None
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet output needs the 'pyarrow' package installed") from e
+    elif os.path.exists(path):
+        os.remove(path)
+    carry = None
+    for chunk_id, offset in enumerate(range(0, rows, chunksize)):
+        rng = np.random.default_rng([seed, chunk_id])
+        size = min(chunksize, rows - offset)
+        frame = _chunk(model, size, offset, rng, carry)
+        carry = {"well": int((offset + size - 1) * model.well_share)}
+        carry.update({col.name: frame[col.name].iloc[-1] for col in model.columns if col.per_well})
+        if path.endswith(".parquet"):
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+        else:
+            frame.to_csv(path, mode="a", header=offset == 0, index=False)
+    if writer is not None:
+        writer.close()
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, required=True, help="rows to generate")
+    parser.add_argument("--out", required=True, help="output path ending in .csv or .parquet")
+    parser.add_argument("--source", default=DEFAULT_DATA_PATH, help="CSV to learn the schema from")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    model = fit(pd.read_csv(args.source))
+    generate(model, args.rows, args.out, seed=args.seed, chunksize=args.chunksize)
+    print(f"Wrote {args.rows:,} rows to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backends import DEFAULT_DATA_PATH  # noqa: E402
+
+SAMPLE_ROWS = 400
+
+
+@pytest.fixture(scope="session")
+def source():
+    """The bundled merged CSV, as read from disk."""
+    return pd.read_csv(os.path.join(ROOT, DEFAULT_DATA_PATH))
+
+
+@pytest.fixture(scope="session")
+def sample_csv(source, tmp_path_factory):
+    """The first ``SAMPLE_ROWS`` rows in a directory of their own, so the SQLite sidecar lands there too."""
+    path = tmp_path_factory.mktemp("data") / "wells.csv"
+    source.head(SAMPLE_ROWS).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture(scope="session")
+def sample_parquet(source, tmp_path_factory):
+    pytest.importorskip("pyarrow")
+    path = tmp_path_factory.mktemp("data") / "wells.parquet"
+    source.head(SAMPLE_ROWS).to_parquet(path, index=False)
+    return str(path)
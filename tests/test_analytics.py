@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics import (ANOMALY_TAIL, ANOMALY_THRESHOLD, COMPARE_COLUMNS, derrick_comparison,
+                       derrick_comparison_totals, driver_regression, driver_regression_from_moments,
+                       pairwise_comparison, pairwise_comparison_from_moments, score_anomalies,
+                       _t_two_sided_p)
+from backends import FilterState, PandasBackend, SQLBackend, prepare_frame
+
+
+def test_derrick_totals_match_row_level_comparison(source):
+    backend = PandasBackend(prepare_frame(source))
+    metrics = COMPARE_COLUMNS
+    sums = backend.aggregate(FilterState(), metrics, how="sum", by="flowline_Shakers")
+    counts = backend.aggregate(FilterState(), metrics, how="count", by="flowline_Shakers")
+    expected = derrick_comparison(source.dropna(subset=["flowline_Shakers"]), metrics)
+    pd.testing.assert_frame_equal(derrick_comparison_totals(sums, counts, metrics), expected)
+
+
+
+def test_driver_regression_recovers_per_group_slopes():
+    rng = np.random.default_rng(1)
+    x = rng.normal(size=600)
+    group = np.repeat(["A", "B", "C"], 200)
+    slope = np.select([group == "A", group == "B"], [2.0, -1.0], 0.5)
+    df = pd.DataFrame({"Contractor": group, "ROP": x, "DSRE": 3 + slope * x + rng.normal(0, 0.01, 600)})
+    result = driver_regression(df, "DSRE", features=["ROP"]).set_index(["Contractor", "term"])
+    scale = x.std()  # coefficients are per standard deviation of the driver
+    for name, expected in [("A", 2.0), ("B", -1.0), ("C", 0.5)]:
+        assert result.loc[(name, "ROP"), "coef"] == pytest.approx(expected * scale, rel=1e-2)
+        assert result.loc[(name, "ROP"), "r2"] > 0.99
+
+
+def test_driver_regression_leaves_underdetermined_groups_nan():
+    df = pd.DataFrame({"Contractor": ["A", "A", "B", "B", "B", "B"], "ROP": [1.0, 2, 1, 2, 3, 4],
+                       "DSRE": [0.5, 0.6, 0.5, 0.6, 0.8, 0.7]})
+    result = driver_regression(df, "DSRE", features=["ROP"]).set_index("Contractor")
+    assert result.loc["A", "coef"].isna().all()
+    assert result.loc["B", "coef"].notna().all()
+
+
+def test_driver_regression_keeps_constant_drivers_nan_with_large_offsets():
+    # Raw sums of squares of IntLength (~1e4) would hide that Hole_Size never varies in A.
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({"Contractor": np.repeat(["A", "B"], 50), "IntLength": rng.normal(1e4, 10, 100),
+                       "Hole_Size": np.r_[np.full(50, 8.75), rng.choice([8.5, 12.25], 50)]})
+    df["DSRE"] = 0.8 + 1e-5 * df["IntLength"] + rng.normal(0, 0.01, 100)
+    result = driver_regression(df, "DSRE", features=["IntLength", "Hole_Size"]).set_index("Contractor")
+    assert result.loc["A", "coef"].isna().all()
+    assert result.loc["B", "coef"].notna().all()
+
+
+def test_driver_regression_from_backend_moments_matches_rows(sample_csv):
+    backend = SQLBackend(sample_csv, engine="sqlite")
+    features = ["AMW", "ROP", "IntLength"]
+    center = backend.aggregate(FilterState(), features, "mean").iloc[0].to_dict()
+    moments = backend.cross_products(FilterState(), ["DSRE"] + features, "Contractor", center=center)
+    actual = driver_regression_from_moments(moments, "DSRE", features, by="Contractor")
+    expected = driver_regression(backend.rows(FilterState()), "DSRE", features, by="Contractor")
+    assert actual["Contractor"].tolist() == expected["Contractor"].tolist()
+    columns = ["coef", "se", "t", "n", "r2"]
+    # Small groups with many drivers are badly conditioned; summation order shows at ~1e-6.
+    np.testing.assert_allclose(actual[columns].to_numpy(float), expected[columns].to_numpy(float),
+                               rtol=1e-4, equal_nan=True)
+
+
+def test_anomaly_flags_stay_a_small_tail(source):
+    scored = score_anomalies(source)
+    by_score = scored["Is_Outlier"] & np.isfinite(scored["Anomaly_Score"])
+    assert by_score.mean() <= ANOMALY_TAIL
+    assert scored.loc[scored["Anomaly_Score"] > ANOMALY_THRESHOLD, "Anomaly_Reason"].ne("").all()
+
+
+def test_anomaly_scores_skip_columns_that_are_mostly_one_value():
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({"Hole_Size": 8.5, "DSRE": rng.normal(0.8, 0.02, 500),
+                       "Down_Loss": np.where(rng.random(500) < 0.7, 0.0, rng.uniform(10, 500, 500))})
+    scored = score_anomalies(df, columns=["DSRE", "Down_Loss"])
+    assert not scored["Anomaly_Reason"].eq("Down_Loss").any()
+    assert scored["Is_Outlier"].mean() <= ANOMALY_TAIL
+
+
+def test_t_p_values_match_tables():
+    p = _t_two_sided_p(np.array([2.0, 1.959964, 0.0]), np.array([10.0, 1e6, 5.0]))
+    np.testing.assert_allclose(p, [0.073388, 0.05, 1.0], atol=1e-5)
+
+
+def test_pairwise_comparison_is_antisymmetric():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "Contractor": np.repeat(["A", "B", "C", "D"], [40, 40, 40, 2]),
+        "DSRE": np.r_[rng.normal(0.8, 0.05, 40), rng.normal(0.8, 0.05, 40), rng.normal(0.6, 0.05, 40), [0.7, 0.7]],
+    })
+    result = pairwise_comparison(df, metrics=["DSRE"]).set_index(["Contractor", "Other"])
+    ac, ca = result.loc[("A", "C")], result.loc[("C", "A")]
+    assert ac["diff"] == pytest.approx(-ca["diff"]) and ac["d"] == pytest.approx(-ca["d"])
+    assert ac["p"] == pytest.approx(ca["p"]) and ac["q"] == pytest.approx(ca["q"])
+    assert ac["d"] > 3 and ac["q"] < 1e-6
+    assert result.loc[("A", "B"), "q"] > 0.05
+    assert result.loc[("A", "D")][["d", "p", "q"]].isna().all()  # below min_rows
+    assert result.loc[("A", "A")][["p", "q"]].isna().all()
+
+
+def test_pairwise_comparison_from_backend_sums_matches_rows(sample_csv):
+    backend = SQLBackend(sample_csv, engine="sqlite")
+    state = FilterState(amw_range=(9.0, 12.0))
+    metrics = ["DSRE", "Total_Dil"]
+    center = backend.aggregate(state, metrics, "mean").iloc[0].to_dict()
+    moments = {metric: backend.cross_products(state, [metric], "Contractor", center=center) for metric in metrics}
+    actual = pairwise_comparison_from_moments(moments, "Contractor", center=center)
+    expected = pairwise_comparison(backend.rows(state), "Contractor", metrics)
+    pd.testing.assert_frame_equal(actual, expected, rtol=1e-9)
@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics import ANOMALY_INPUTS, ANOMALY_THRESHOLD, score_anomalies
+from backends import FilterState, SQLBackend, open_backend, parse_dates, read_data
+
+KPIS = {
+    "Haul per ft": "Haul_OFF / IntLength",
+    "Efficiency Score": "DSRE * 100 - Dilution_Ratio * 10 - `Discard Ratio` * 10",
+    "Broken": "Nope * 2",
+}
+METRICS = ["Total_Dil", "Total_SCE", "DSRE", "Haul per ft", "Efficiency Score"]
+
+
+@pytest.fixture(scope="module")
+def backends(sample_csv):
+    pandas = open_backend("pandas", sample_csv).with_kpis(KPIS)
+    sqlite = SQLBackend(sample_csv, engine="sqlite").with_kpis(KPIS)
+    return pandas, sqlite
+
+
+def states(backend):
+    operator = backend.options("Operator", FilterState())[0]
+    return [
+        FilterState(),
+        FilterState(operator=operator),
+        FilterState(hole_size=8.5, amw_range=(9.0, 12.0)),
+        FilterState(int_range=(0.0, 5000.0), td_year=2023),
+        FilterState(regime=backend.options("Regime", FilterState())[0]),
+    ]
+
+
+def test_invalid_kpis_are_reported_not_added(backends):
+    for backend in backends:
+        assert set(backend.kpi_errors) == {"Broken"}
+        assert "Haul per ft" in backend.columns() and "Broken" not in backend.columns()
+
+
+def test_sql_matches_pandas(backends):
+    pandas, sqlite = backends
+    for state in states(pandas):
+        assert sqlite.count(state) == pandas.count(state), state
+        assert sqlite.count(state, where=("DSRE", ">", 0.9)) == pandas.count(state, where=("DSRE", ">", 0.9))
+        expected = pandas.aggregate(state, METRICS).iloc[0]
+        actual = sqlite.aggregate(state, METRICS).iloc[0]
+        np.testing.assert_allclose(actual[METRICS].to_numpy(float), expected[METRICS].to_numpy(float),
+                                   rtol=1e-9, equal_nan=True)
+        for column in ["Operator", "Contractor", "Hole_Size", "Regime"]:
+            assert sqlite.options(column, state) == pandas.options(column, state), (state, column)
+
+
+def test_chunked_ingestion_matches(backends, sample_csv, tmp_path):
+    # Regimes are still fitted once over all chunks, but smaller chunks feed the
+    # mini-batches in another order, so the regime filter isn't compared here.
+    pandas, _ = backends
+    path = tmp_path / "wells.csv"
+    path.write_bytes(open(sample_csv, "rb").read())
+    chunked = SQLBackend(str(path), engine="sqlite", chunksize=150).with_kpis(KPIS)
+    for state in states(pandas)[:-1]:
+        assert chunked.count(state) == pandas.count(state), state
+        np.testing.assert_allclose(chunked.aggregate(state, METRICS).iloc[0].to_numpy(float),
+                                   pandas.aggregate(state, METRICS).iloc[0].to_numpy(float),
+                                   rtol=1e-9, equal_nan=True)
+    assert len(chunked.options("Regime", FilterState())) == 5
+
+
+def test_sql_ingestion_stores_anomaly_scores(sample_csv, tmp_path):
+    # Scores compare every row with the whole file, so chunking must not change them.
+    path = tmp_path / "wells.csv"
+    path.write_bytes(open(sample_csv, "rb").read())
+    pandas = open_backend("pandas", str(path), score=score_anomalies)
+    sqlite = SQLBackend(str(path), engine="sqlite", chunksize=150, score=score_anomalies, score_inputs=ANOMALY_INPUTS)
+    columns = ["Anomaly_Score", "Anomaly_Reason", "Is_Outlier"]
+    expected, actual = pandas.rows(FilterState(), columns), sqlite.rows(FilterState(), columns)
+    np.testing.assert_allclose(actual["Anomaly_Score"], expected["Anomaly_Score"])
+    assert actual["Anomaly_Reason"].tolist() == expected["Anomaly_Reason"].tolist()
+    assert actual["Is_Outlier"].astype(bool).tolist() == expected["Is_Outlier"].tolist()
+    state = FilterState(max_anomaly=ANOMALY_THRESHOLD)
+    assert sqlite.count(state) == pandas.count(state) < pandas.count(FilterState())
+
+
+def test_grouped_aggregates_match(backends):
+    pandas, sqlite = backends
+    expected = pandas.aggregate(FilterState(), METRICS, how="sum", by="Operator")
+    actual = sqlite.aggregate(FilterState(), METRICS, how="sum", by="Operator")
+    assert actual["Operator"].tolist() == expected["Operator"].tolist()
+    np.testing.assert_allclose(actual[METRICS].to_numpy(float), expected[METRICS].to_numpy(float),
+                               rtol=1e-9, equal_nan=True)
+
+
+def test_cross_products_match(backends):
+    pandas, sqlite = backends
+    columns = ["DSRE", "ROP", "Haul per ft"]
+    for state in states(pandas):
+        expected = pandas.cross_products(state, columns, "Contractor", center={"ROP": 50.0})
+        actual = sqlite.cross_products(state, columns, "Contractor", center={"ROP": 50.0})
+        assert actual["Contractor"].tolist() == expected["Contractor"].tolist()
+        assert list(actual.columns) == list(expected.columns)
+        np.testing.assert_allclose(actual.iloc[:, 1:].to_numpy(float), expected.iloc[:, 1:].to_numpy(float),
+                                   rtol=1e-9)
+
+
+def test_parse_dates_reads_both_formats_without_swapping():
+    parsed = parse_dates(pd.Series(["2017-03-04 00:00:00", "13-08-2017", "03-04-2017", None, "junk"]))
+    assert parsed.dt.strftime("%Y-%m-%d").tolist()[:3] == ["2017-03-04", "2017-08-13", "2017-04-03"]
+    assert parsed.iloc[3:].isna().all()
+
+
+def test_parquet_reads_like_csv(sample_csv, sample_parquet):
+    from_csv, from_parquet = read_data(sample_csv), read_data(sample_parquet)
+    assert list(from_parquet.columns) == list(from_csv.columns)
+    assert from_csv["TD_Year"].notna().all()
+    for column in ["TD_Year", "TD_Month", "Total_Dil", "Well_ID", "Canonical_Well", "Regime"]:
+        pd.testing.assert_series_equal(from_parquet[column], from_csv[column], check_dtype=False)
+
+
+@pytest.mark.parametrize("kind", ["pandas", "sqlite"])
+def test_parquet_backends_keep_regimes(sample_parquet, kind):
+    backend = open_backend(kind, sample_parquet)
+    assert len(backend.options("Regime", FilterState())) == 5
+
+
+def test_filter_state_round_trips_through_params():
+    state = FilterState(operator="EQT Corporation", hole_size=8.5, amw_range=(9.0, 12.5), td_year=2023)
+    assert FilterState.from_params(state.to_params()) == state
+    assert FilterState.from_params({**state.to_params(), "unknown": "x"}).key() == state.key()
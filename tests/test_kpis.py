@@ -0,0 +1,127 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from kpis import BUILTIN_KPIS, KPIError, add_kpis, compile_kpi, compile_kpis, delete_kpi, load_kpis, save_kpi
+
+COLUMNS = ["Haul_OFF", "IntLength", "DSRE", "Dilution_Ratio", "Discard Ratio"]
+
+
+def frame():
+    return pd.DataFrame({
+        "Haul_OFF": [100.0, 50.0, 0.0],
+        "IntLength": [1000.0, 0.0, 500.0],
+        "DSRE": [0.8, 0.9, 0.7],
+        "Dilution_Ratio": [1.2, 0.8, 1.0],
+        "Discard Ratio": [0.5, 0.4, np.nan],
+    })
+
+
+@pytest.mark.parametrize("expression", [
+    "Haul_OFF / IntLength",
+    "DSRE * 100 - `Discard Ratio` * 10",
+    "sqrt(abs(Haul_OFF)) + log(IntLength + 1) - exp(-DSRE)",
+    "-(Dilution_Ratio ** 2) + 1.5",
+    "fillna(`Discard Ratio`, 0) * 10",
+])
+def test_accepts_the_grammar(expression):
+    kpi = compile_kpi("k", expression, COLUMNS)
+    assert set(kpi.columns) <= set(COLUMNS)
+    assert len(kpi.evaluate(frame())) == 3
+
+
+@pytest.mark.parametrize("expression, message", [
+    ("Haul_OFF.sum()", "Not allowed"),
+    ("__import__('os')", "Not allowed"),
+    ("Haul_OFF[0]", "Not allowed"),
+    ("DSRE > 0.5", "Not allowed"),
+    ("round(DSRE)", "Not allowed"),
+    ("sqrt(DSRE, 2)", "exactly one argument"),
+    ("fillna(DSRE)", "exactly two arguments"),
+    ("'a' + DSRE", "Only numbers"),
+    ("True * DSRE", "Only numbers"),
+    ("Nope * 2", "Unknown column"),
+    ("`No Such Column` + 1", "Unknown column"),
+    ("DSRE *", "Can't parse"),
+])
+def test_rejects_everything_else(expression, message):
+    with pytest.raises(KPIError, match=message):
+        compile_kpi("k", expression, COLUMNS)
+
+
+def test_rejects_names_that_shadow_a_column():
+    with pytest.raises(KPIError, match="already a column"):
+        compile_kpi("DSRE", "DSRE * 2", COLUMNS)
+    with pytest.raises(KPIError, match="needs a name"):
+        compile_kpi("  ", "DSRE * 2", COLUMNS)
+
+
+def test_division_by_zero_is_nan_not_inf():
+    values = compile_kpi("Haul per ft", "Haul_OFF / IntLength", COLUMNS).evaluate(frame())
+    assert values.tolist()[0] == pytest.approx(0.1)
+    assert np.isnan(values.iloc[1])
+    assert values.iloc[2] == 0.0
+
+
+def test_builtin_counts_missing_inputs_as_zero_like_the_original_score():
+    df = frame()
+    kpi = compile_kpi("Efficiency Score", BUILTIN_KPIS["Efficiency Score"], COLUMNS)
+    expected = df["DSRE"].fillna(0) * 100 - df["Dilution_Ratio"].fillna(0) * 10 - df["Discard Ratio"].fillna(0) * 10
+    pd.testing.assert_series_equal(kpi.evaluate(df), expected, check_names=False)
+    assert kpi.evaluate(df).iloc[2] == pytest.approx(60.0)
+
+
+def test_sql_rendering_guards_division_and_domains():
+    def sql(expression):
+        return compile_kpi("k", expression, COLUMNS).sql(lambda c: f'"{c}"')
+
+    assert sql("Haul_OFF / `Discard Ratio`") == \
+        '(CAST("Haul_OFF" AS DOUBLE) / NULLIF(CAST("Discard Ratio" AS DOUBLE), 0))'
+    assert sql("log(DSRE)") == 'CASE WHEN CAST("DSRE" AS DOUBLE) > 0 THEN LN(CAST("DSRE" AS DOUBLE)) END'
+    assert sql("sqrt(DSRE)") == 'CASE WHEN CAST("DSRE" AS DOUBLE) >= 0 THEN SQRT(CAST("DSRE" AS DOUBLE)) END'
+    assert sql("fillna(DSRE, 0)") == 'COALESCE(CAST("DSRE" AS DOUBLE), 0.0)'
+
+
+@pytest.mark.parametrize("engine", ["sqlite", "duckdb"])
+def test_sql_matches_numpy(engine, tmp_path):
+    df = frame().assign(DSRE=[0.8, -0.9, 0.0])
+    definitions = {
+        "Efficiency Score": BUILTIN_KPIS["Efficiency Score"],
+        "Haul per ft": "Haul_OFF / IntLength",
+        "Log": "log(DSRE) + sqrt(DSRE - 0.5)",
+        "Filled": "fillna(log(DSRE), -1) + fillna(Haul_OFF / IntLength, 0)",
+    }
+    kpis, errors = compile_kpis(definitions, COLUMNS)
+    assert not errors
+    path = tmp_path / "kpis.csv"
+    df.to_csv(path, index=False)  # missing values reach both engines as NULL, as in the backends
+    if engine == "duckdb":
+        duckdb = pytest.importorskip("duckdb")
+        conn = duckdb.connect()
+        conn.execute(f"CREATE TABLE t AS SELECT * FROM read_csv_auto('{path}')")
+    else:
+        conn = sqlite3.connect(":memory:")
+        pd.read_csv(path).to_sql("t", conn, index=False)
+    select = ", ".join(kpi.sql(lambda c: '"' + c.replace('"', '""') + '"') for kpi in kpis)
+    actual = np.array(conn.execute(f"SELECT {select} FROM t").fetchall(), dtype=float)
+    expected = add_kpis(df, kpis)[[kpi.name for kpi in kpis]].to_numpy(float)
+    np.testing.assert_allclose(actual, expected, rtol=1e-12, equal_nan=True)
+
+
+def test_compile_kpis_splits_valid_and_invalid():
+    kpis, errors = compile_kpis({"ok": "DSRE * 2", "bad": "Nope + 1"}, COLUMNS)
+    assert [kpi.name for kpi in kpis] == ["ok"]
+    assert set(errors) == {"bad"}
+
+
+def test_saved_definitions_round_trip(tmp_path):
+    path = str(tmp_path / "kpis.json")
+    save_kpi("Haul per ft", "Haul_OFF / IntLength", COLUMNS, path)
+    save_kpi("Efficiency Score", "DSRE * 100", COLUMNS, path)
+    assert load_kpis(path) == {"Efficiency Score": "DSRE * 100", "Haul per ft": "Haul_OFF / IntLength"}
+    with pytest.raises(KPIError):
+        save_kpi("Broken", "Nope + 1", COLUMNS, path)
+    delete_kpi("Efficiency Score", path)
+    assert load_kpis(path)["Efficiency Score"] == BUILTIN_KPIS["Efficiency Score"]
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from regimes import RegimeError, add_regimes, assign_regimes, fit_regimes, frame_chunks
+
+
+def blobs(rows=300, seed=0):
+    """Three well-separated groups on two of the regime features."""
+    rng = np.random.default_rng(seed)
+    centres = np.repeat([[9.0, 0.90], [12.0, 0.80], [15.0, 0.70]], rows // 3, axis=0)
+    values = centres + rng.normal(0, [0.1, 0.005], centres.shape)
+    return pd.DataFrame({"AMW": values[:, 0], "DSRE": values[:, 1], "group": np.repeat([0, 1, 2], rows // 3)})
+
+
+def test_recovers_separated_groups():
+    df = blobs()
+    model = fit_regimes(frame_chunks(df, rows=70), k=3)
+    labels = assign_regimes(df, model)
+    assert pd.crosstab(df["group"], labels).gt(0).sum(axis=1).eq(1).all()
+    assert labels.nunique() == 3
+    assert model.labels[0].startswith("R1") and "High DSRE" in model.labels[0]  # best DSRE first
+
+
+def test_same_seed_same_model():
+    df = blobs()
+    first, second = fit_regimes(frame_chunks(df), k=3), fit_regimes(frame_chunks(df), k=3)
+    np.testing.assert_array_equal(first.centers, second.centers)
+
+
+def test_read_only_input_arrays():
+    # Parquet-backed frames hand out read-only arrays under copy-on-write.
+    df = blobs().assign(ROP=np.linspace(10, 200, 300))
+    frozen = pd.DataFrame({col: np.array(df[col]) for col in df.columns})
+    for col in frozen.columns:
+        frozen[col].to_numpy().flags.writeable = False
+    assert "Regime" in add_regimes(frozen, k=3).columns
+
+
+def test_unusable_data_raises_regime_error():
+    with pytest.raises(RegimeError):
+        fit_regimes(frame_chunks(pd.DataFrame({"Other": [1.0, 2.0]})))
+    with pytest.raises(RegimeError):
+        fit_regimes(frame_chunks(blobs().head(2)), k=3)
+    assert "Regime" not in add_regimes(pd.DataFrame({"AMW": [9.0, 10.0]})).columns
@@ -0,0 +1,14 @@
+from reports import file_names, slugify
+
+
+def test_slugify():
+    assert slugify("H&P 419.") == "H_P_419"
+    assert slugify("  ") == "unnamed"
+
+
+def test_file_names_are_unique():
+    groups = ["Devon Energy", "Devon Energy ", "H&P 419", "H&P 419.", "h&p 419", "Oxy"]
+    names = file_names(groups)
+    assert len({name.lower() for name in names.values()}) == len(groups)
+    assert names["Devon Energy"] == "Devon_Energy" and names["Devon Energy "] == "Devon_Energy_2"
+    assert names["h&p 419"] == "h_p_419_3"
@@ -0,0 +1,42 @@
+import pandas as pd
+
+from snapshots import diff
+
+
+def snapshot():
+    return pd.DataFrame({
+        "Well_Job_ID": [1, 2, 3, 4],
+        "API Number": ["4200000001", "4200000002", "4200000003", "4200000004"],
+        "Hole_Size": [8.5, 8.5, 6.75, 6.75],
+        "DSRE": [0.8, 0.7, 0.9, 0.6],
+        "Total_Dil": [100.0, 200.0, 300.0, 400.0],
+    })
+
+
+def test_added_removed_and_changed_rows():
+    old = snapshot()
+    new = old[old["Well_Job_ID"] != 4].copy()
+    new.loc[new["Well_Job_ID"] == 2, "DSRE"] = 0.75
+    new = pd.concat([new, pd.DataFrame({"Well_Job_ID": [5], "API Number": ["4200000005"], "Hole_Size": [8.5],
+                                        "DSRE": [0.85], "Total_Dil": [150.0]})], ignore_index=True)
+    result = diff(old, new, metrics=["DSRE", "Total_Dil"])
+    assert result.counts() == {"added": 1, "removed": 1, "changed": 1}
+    assert result.added["Well_Job_ID"].tolist() == [5]
+    assert result.removed["Well_Job_ID"].tolist() == [4]
+    change = result.changed.iloc[0]
+    assert (change["Well_Job_ID"], change["column"], change["old"], change["new"]) == (2, "DSRE", 0.7, 0.75)
+
+    impact = result.impact.set_index("Metric")
+    parts = impact[["From_Removed", "From_Added", "From_Changed"]].sum(axis=1)
+    pd.testing.assert_series_equal(parts, impact["Delta"].astype(float), check_names=False)
+
+
+def test_reordering_and_dtype_changes_are_not_changes():
+    old = snapshot()
+    new = old.iloc[::-1].astype({"Well_Job_ID": float}).reset_index(drop=True)
+    assert diff(old, new).counts() == {"added": 0, "removed": 0, "changed": 0}
+
+
+def test_duplicate_keys_pair_up():
+    old = pd.concat([snapshot(), snapshot().head(1)], ignore_index=True)
+    assert diff(old, old.sample(frac=1, random_state=0)).counts() == {"added": 0, "removed": 0, "changed": 0}
@@ -0,0 +1,22 @@
+import pandas as pd
+
+from backends import DATE_FORMAT
+from synthdata import fit, generate
+
+
+def test_generated_data_keeps_schema_dates_and_well_level_columns(source, tmp_path):
+    sample = source.head(600)
+    model = fit(sample)
+    path = str(tmp_path / "synthetic.csv")
+    generate(model, 1500, path, seed=3, chunksize=400)
+    synthetic = pd.read_csv(path)
+    assert list(synthetic.columns) == list(sample.columns)
+    assert len(synthetic) == 1500
+    assert pd.to_datetime(synthetic["TD_Date"], format=DATE_FORMAT, errors="coerce").notna().all()
+    per_well = [col.name for col in model.columns if col.per_well]
+    assert "Operator" in per_well
+    assert synthetic.groupby("Well_Name")[per_well].nunique(dropna=False).max().max() == 1
+
+    again = str(tmp_path / "again.csv")
+    generate(model, 1500, again, seed=3, chunksize=400)
+    pd.testing.assert_frame_equal(pd.read_csv(again), synthetic)
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from wells import normalize_name, resolve_wells
+
+
+def records(**columns):
+    base = {"Well_Name": [], "Operator": "Oxy", "API Number": np.nan, "State Code": "42", "County Code": "301",
+            "Latitude": np.nan, "Longitude": np.nan}
+    base.update(columns)
+    return pd.DataFrame(base)
+
+
+def test_normalize_name_drops_job_suffix_and_punctuation():
+    names = pd.Series(["Leeper 10H - 3415", "LEEPER  10h", "Cromika #8H-3350", None])
+    assert normalize_name(names).tolist() == ["leeper 10h", "leeper 10h", "cromika 8h", ""]
+
+
+def test_merges_name_variants_of_one_well():
+    df = records(Well_Name=["Leeper 10H - 3415", "Leeper 10H", "Leeper 10H", "Leeper 11H"],
+                 **{"API Number": ["4230100001", np.nan, "4230100001", np.nan]})
+    ids = resolve_wells(df)
+    assert ids["Well_ID"].iloc[0] == ids["Well_ID"].iloc[1] == ids["Well_ID"].iloc[2]
+    assert ids["Well_ID"].iloc[3] != ids["Well_ID"].iloc[0]  # different designator
+    assert ids["Canonical_Well"].iloc[0] == "Leeper 10H"
+
+
+def test_conflicting_api_or_distance_vetoes_a_match():
+    df = records(Well_Name=["Smith 1H", "Smith 1H", "Jones 2H", "Jones 2H"],
+                 **{"API Number": ["4230100001", "4230100002", np.nan, np.nan],
+                    "Latitude": [np.nan, np.nan, 31.0, 31.5], "Longitude": [np.nan, np.nan, -103.0, -103.0]})
+    assert resolve_wells(df)["Well_ID"].nunique() == 4
+
+
+def test_ids_align_with_the_index():
+    df = records(Well_Name=["A 1H", "B 2H"]).set_axis([10, 20])
+    assert list(resolve_wells(df).index) == [10, 20]
@@ -0,0 +1,50 @@
+"""Named saved views: filter states persisted to a small JSON file.
+
+Each view stores the ``FilterState`` query parameters and its canonical key,
+so a saved view, a shared ``?operator=...`` link and the result cache all
+agree on what "the same view" means. The file defaults to
+``saved_views.json`` next to the app and can be moved with ``RIG_VIEWS``.
+"""
+import json
+import os
+from datetime import datetime, timezone
+
+from backends import FilterState
+
+VIEWS_PATH = os.environ.get("RIG_VIEWS", "saved_views.json")
+
+
+def load_views(path=VIEWS_PATH):
+    """``{name: {"params": {...}, "key": str, "saved": iso-timestamp}}``."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write(views, path):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(views, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)  # atomic, so concurrent sessions never read half a file
+
+
+def save_view(name, state, path=VIEWS_PATH):
+    views = load_views(path)
+    views[name] = {
+        "params": state.to_params(),
+        "key": state.key(),
+        "saved": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    _write(views, path)
+    return views[name]
+
+
+def delete_view(name, path=VIEWS_PATH):
+    views = load_views(path)
+    if views.pop(name, None) is not None:
+        _write(views, path)
+
+
+def view_state(name, path=VIEWS_PATH):
+    return FilterState.from_params(load_views(path)[name]["params"])
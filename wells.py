@@ -0,0 +1,158 @@
+"""Entity resolution for wells that appear under more than one identity.
+
+The same well can show up with a slightly different name ("Leeper 10H - 3415"
+vs "Leeper 10H"), with or without its API Number or coordinates. A name splits
+into designators (short tokens and tokens with digits: "W3", "21H", "B") and
+lease words; two records can only be the same well if their designators agree
+exactly. Comparing every pair of wells is quadratic, so records are first
+*blocked* on their designators plus one of:
+
+- State Code + County Code + a coordinate grid cell (twice, on grids offset
+  by half a cell, so two records either side of a cell edge still meet);
+- State Code + County Code alone where there are no coordinates;
+- Operator, so a record with IDs meets its copy without them.
+
+Pairs are only compared inside a block. They match when nothing contradicts
+it (different 10-digit API well codes, or coordinates too far apart) and
+either the API codes match or the lease words are similar enough. Matches are
+merged with union-find; every row gets a ``Well_ID`` and a ``Canonical_Well``
+name (the most common name in its group) that views can group by.
+"""
+import re
+from difflib import SequenceMatcher
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+IDENTITY_COLUMNS = [
+    "Well_Name", "Operator", "API Number", "State Code", "County Code",
+    "Latitude", "Longitude", "Well_Coord_Lat", "Well_Coord_Lon",
+]
+GRID_DEGREES = 0.01  # ~1 km cells
+MAX_DISTANCE_M = 150.0
+NAME_SIMILARITY = 0.9  # one typo in a ten-letter lease passes; "North" vs "South" does not
+
+# Trailing job/rig numbers some sources append after the well number: "Cromika 8H - 3350".
+_JOB_SUFFIX = re.compile(r"(\d+\s*h)\s*-?\s*\d{4}$")
+
+
+def normalize_name(names):
+    """Lower-case, drop job-number suffixes, punctuation becomes single spaces."""
+    text = names.astype("string").str.lower().str.strip()
+    text = text.str.replace(_JOB_SUFFIX, r"\1", regex=True)
+    return text.str.replace(r"[^a-z0-9]+", " ", regex=True).str.strip().fillna("")
+
+
+def _records(df):
+    """Distinct identity tuples (a well's intervals collapse to one record) and each row's record."""
+    columns = [col for col in IDENTITY_COLUMNS if col in df.columns]
+    codes, first = pd.factorize(pd.util.hash_pandas_object(df[columns], index=False))
+    starts = np.full(len(first), len(df))
+    np.minimum.at(starts, codes, np.arange(len(df)))
+    records = df.iloc[starts]
+    out = pd.DataFrame(index=np.arange(len(records)))
+    names = normalize_name(records["Well_Name"]).tolist()
+    designators, leases = [], []
+    for words in (name.split() for name in names):
+        short = [len(w) <= 3 or any(c.isdigit() for c in w) for w in words]
+        designators.append(" ".join(sorted(w for w, d in zip(words, short) if d)))
+        leases.append("".join(w for w, d in zip(words, short) if not d))
+    out["name"] = names
+    out["designators"] = designators
+    out["lease"] = leases
+    api = records["API Number"].astype("string") if "API Number" in records else pd.Series(pd.NA, index=records.index)
+    api = api.where(api.str.fullmatch(r"\d{10,14}", na=False))
+    out["api"] = api.str[:10].to_numpy()
+
+    def coord(primary, fallback):
+        value = pd.to_numeric(records[primary], errors="coerce") if primary in records else pd.Series(np.nan, index=records.index)
+        if fallback in records:
+            value = value.fillna(pd.to_numeric(records[fallback], errors="coerce"))
+        return value.to_numpy(dtype=float)
+
+    out["lat"] = coord("Latitude", "Well_Coord_Lat")
+    out["lon"] = coord("Longitude", "Well_Coord_Lon")
+    for col, source in [("state", "State Code"), ("county", "County Code"), ("operator", "Operator")]:
+        out[col] = records[source].astype("string").to_numpy() if source in records else pd.NA
+    return out, codes
+
+
+def _blocks(records):
+    """Yield arrays of record positions that should be compared with each other."""
+    located = records["state"].notna() & records["county"].notna()
+    has_coords = located & np.isfinite(records["lat"]) & np.isfinite(records["lon"])
+    keys = []
+    for offset in (0.0, 0.5):
+        cell_lat = np.floor(records["lat"] / GRID_DEGREES + offset)
+        cell_lon = np.floor(records["lon"] / GRID_DEGREES + offset)
+        keys.append(f"grid{offset}|" + records["state"] + "|" + records["county"] + "|"
+                    + cell_lat.astype("Int64").astype("string") + "|" + cell_lon.astype("Int64").astype("string"))
+        keys[-1] = keys[-1].where(has_coords)
+    keys.append(("county|" + records["state"] + "|" + records["county"]).where(located & ~has_coords))
+    keys.append("operator|" + records["operator"].fillna(""))
+    for key in keys:
+        key = (records["designators"] + "|" + key).where(records["name"] != "")
+        groups = pd.Series(np.arange(len(records))).groupby(key.to_numpy(), dropna=True).indices
+        for members in groups.values():
+            if len(members) > 1:
+                yield members
+
+
+def _distance_m(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6_371_000 * np.arcsin(np.sqrt(a))
+
+
+def _same_well(a, b, max_distance_m, similarity):
+    if a["designators"] != b["designators"]:
+        return False
+    if not pd.isna(a["api"]) and not pd.isna(b["api"]) and a["api"] != b["api"]:
+        return False
+    if np.isfinite([a["lat"], a["lon"], b["lat"], b["lon"]]).all() and \
+            _distance_m(a["lat"], a["lon"], b["lat"], b["lon"]) > max_distance_m:
+        return False
+    if not pd.isna(a["api"]) and a["api"] == b["api"]:
+        return True
+    return SequenceMatcher(None, a["lease"], b["lease"]).ratio() >= similarity
+
+
+def resolve_wells(df, max_distance_m=MAX_DISTANCE_M, similarity=NAME_SIMILARITY):
+    """``Well_ID`` and ``Canonical_Well`` for every row of ``df``, aligned to its index."""
+    records, codes = _records(df)
+    parent = np.arange(len(records))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    rows = records.astype(object).to_dict("records")
+    compared = set()
+    for members in _blocks(records):
+        for i, j in combinations(members.tolist(), 2):
+            root_i, root_j = find(i), find(j)
+            if root_i == root_j or (i, j) in compared:
+                continue
+            compared.add((i, j))
+            if _same_well(rows[i], rows[j], max_distance_m, similarity):
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    roots = np.array([find(i) for i in range(len(records))])
+    cluster, _ = pd.factorize(roots[codes])
+    labels = pd.DataFrame({"cluster": cluster, "name": df["Well_Name"].to_numpy()})
+    counts = labels.value_counts(sort=True).reset_index()
+    canonical = counts.drop_duplicates("cluster").set_index("cluster")["name"]
+    return pd.DataFrame({
+        "Well_ID": pd.Series(cluster + 1).map("W{:05d}".format).to_numpy(),
+        "Canonical_Well": canonical.reindex(cluster).to_numpy(),
+    }, index=df.index)
+
+
+def add_well_ids(df):
+    """``df`` with ``Well_ID`` and ``Canonical_Well`` columns added."""
+    if "Well_Name" not in df.columns:
+        return df
+    return df.assign(**resolve_wells(df))